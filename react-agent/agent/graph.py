@@ -7,6 +7,9 @@ from agent.nodes import run_agent_reasoning, tool_node
 AGENT_REASON = "agent_reason"
 ACT = "act"
 LAST = -1
+# Write checkpoints synchronously at the end of each step. The default "async" mode
+# chains pending checkpoint writes across steps, which keeps them alive in memory.
+DURABILITY = "sync"
 
 
 def _should_continue(state: MessagesState) -> str:
@@ -1,24 +1,47 @@
+import functools
+
+import httpx
+import openai
+from langchain_core.callbacks import adispatch_custom_event
+from langchain_core.messages import AIMessage, SystemMessage
 from langgraph.graph import MessagesState
 from langgraph.prebuilt import ToolNode
 
 from context_store import get_context_value
-from tools.react import llm, tools
+from tools.react import get_llm, tools
+
+__all__ = ["run_agent_reasoning", "tool_node"]
 
 SYSTEM_MESSAGE = """
 You are a helpful assistant that can use tools to answer questions.
 Greet the user by their name if provided. The user's name is: {user_name}
 """
 
+TIMEOUT_REPLY = "Sorry, the assistant took too long to respond. Please try again."
+# Custom event carrying replies that are not streamed by the chat model
+REPLY_EVENT = "agent_reply"
+
+
+@functools.lru_cache(maxsize=1024)
+def _system_message(user_name: str) -> SystemMessage:
+    """Format the system prompt once per user name and reuse it across turns."""
+    return SystemMessage(content=SYSTEM_MESSAGE.format(user_name=user_name))
+
 
-def run_agent_reasoning(state: MessagesState) -> MessagesState:
+async def run_agent_reasoning(state: MessagesState) -> MessagesState:
     """
     Run the agent reasoning node.
     """
     user_name = get_context_value("USER_NAME") or "User"
-    system_message = SYSTEM_MESSAGE.format(user_name=user_name)
-    response = llm.invoke(
-        [{"role": "system", "content": system_message}, *state["messages"]]
-    )
+    try:
+        response = await get_llm().ainvoke(
+            [_system_message(user_name), *state["messages"]]
+        )
+    except (openai.APITimeoutError, httpx.TimeoutException):
+        # The client times out on connect and on each wait for a token (see
+        # LLM_TIMEOUT_SECONDS); a stalled stream is not retried, only apologised for
+        response = AIMessage(content=TIMEOUT_REPLY)
+        await adispatch_custom_event(REPLY_EVENT, {"content": TIMEOUT_REPLY})
     return {"messages": [response]}
 
 
@@ -1,20 +1,71 @@
 # api.py
+import asyncio
+import functools
 import os
+import sys
 import uuid
-from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Tuple
 
+import orjson
 from fastapi import FastAPI, HTTPException, Security
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.messages import (
+    AIMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+)
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
 from pydantic import BaseModel
 
-from agent.graph import build_app
-from context_store import clear_context, set_context
+from agent.graph import DURABILITY, build_app
+from agent.nodes import REPLY_EVENT
+from context_store import reset_context, set_context
 from services.acquire_token import AcquireToken
+from services.http_client import async_client, http2_client, session
 from services.site_info import SiteInfo
+from session_store import session_store
+from session_token import (
+    ExpiredSessionId,
+    MalformedSessionId,
+    SessionTokenMismatch,
+    issue_session_id,
+    verify_session_id,
+)
+
+_graph_app = None
+
+
+def get_graph():
+    """Return the compiled agent graph, building it on first use."""
+    global _graph_app
+    if _graph_app is None:
+        _graph_app = build_app()
+    return _graph_app
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Compile the graph before the server reports ready so the first chat
+    # request does not pay for it
+    get_graph()
+    yield
+    await async_client.aclose()
+    session.close()
+    http2_client.close()
+    _oauth_pool.shutdown(wait=False)
 
-app = FastAPI(title="SharePoint Genie Chat API")
+
+# ORJSONResponse encodes responses with orjson (numpy values included) instead of stdlib json
+app = FastAPI(
+    title="SharePoint Genie Chat API",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # tighten in production
@@ -23,14 +74,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-graph_app = build_app()
-
-# Simple in-memory store (replace with Redis or DB for production)
-SESSIONS: Dict[str, List[Any]] = {}
-
 # Reusable security scheme for extracting Bearer tokens
 bearer_scheme = HTTPBearer(auto_error=False)
 
+# Streamed tokens are coalesced into SSE frames: the batch starts at one token for a
+# fast first frame and grows geometrically, with a time-based flush for slow streams.
+STREAM_BATCH_START = 1
+STREAM_BATCH_GROWTH = 3
+STREAM_BATCH_MAX = 50
+STREAM_FLUSH_INTERVAL = 0.05  # seconds
+# The interval is only checked as tokens arrive, so buffered text is also flushed when
+# the model finishes a message or a tool starts, rather than held until it returns
+STREAM_FLUSH_EVENTS = frozenset({"on_chat_model_end", "on_tool_start"})
+
+# User turns kept in the checkpointed thread and the session history; older turns
+# are dropped so each LLM call's prompt stays bounded
+HISTORY_TURNS = 8
+
+# Blocking OAuth/Graph lookups run on their own small pool so a slow identity
+# endpoint cannot exhaust the default threadpool used by the rest of the app
+_oauth_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="oauth")
+# Session inits allowed in flight at once; further requests are shed with a 503
+_oauth_slots = asyncio.Semaphore(16)
+
 
 class InitSessionRequest(BaseModel):
     siteUrl: str
@@ -53,7 +119,7 @@ class ChatResponse(BaseModel):
 
 
 @app.post("/session/init", response_model=InitSessionResponse)
-def init_session(
+async def init_session(
     req: InitSessionRequest,
     credentials: HTTPAuthorizationCredentials = Security(bearer_scheme),
 ):
@@ -62,34 +128,41 @@ def init_session(
     Authorization:
         Bearer <token> header. The bearer token will be used as the user_assertion (delegated user token for OBO flow).
     """
-    sessionId = uuid.uuid4().hex
-    SESSIONS[sessionId] = [
+    history = [
         SystemMessage(
             content="You are a helpful assistant for SharePoint and OneDrive tasks."
-        )
+        ),
+        AIMessage(content="Session initialized. How can I help you?"),
     ]
-    # Store context for this session (if you keep global context var, reset each request)
-    SESSIONS[sessionId].append(
-        AIMessage(content="Session initialized. How can I help you?")
-    )
     # Derive user_assertion: body value wins; fallback to Authorization header if present
     header_token = None
     if credentials and credentials.scheme.lower() == "bearer":
         header_token = credentials.credentials
+    sid, sessionId = issue_session_id(header_token)
 
-    token = AcquireToken(
-        site_url=req.siteUrl,
-        tenant_id=os.environ["TENANT_ID"],
-        client_id=os.environ["CLIENT_ID"],
-        client_secret=os.environ["CLIENT_SECRET"],
-        resource_url=os.environ["RESOURCE"],
-        user_assertion=header_token,
-    )
+    if _oauth_slots.locked():
+        raise HTTPException(
+            status_code=503,
+            detail="Too many session initializations in progress",
+            headers={"Retry-After": "1"},
+        )
+    async with _oauth_slots:
+        token = await AcquireToken.create(
+            site_url=req.siteUrl,
+            tenant_id=os.environ["TENANT_ID"],
+            client_id=os.environ["CLIENT_ID"],
+            client_secret=os.environ["CLIENT_SECRET"],
+            resource_url=os.environ["RESOURCE"],
+            user_assertion=header_token,
+        )
 
-    site = SiteInfo(
-        site_url=req.siteUrl,
-        access_token=token.access_token,
-    )
+        # SiteInfo still uses blocking requests; keep it off the event loop
+        site = await asyncio.get_running_loop().run_in_executor(
+            _oauth_pool,
+            functools.partial(
+                SiteInfo, site_url=req.siteUrl, access_token=token.access_token
+            ),
+        )
 
     # Persist per-session context (avoid storing None fields)
     ctx_payload = {
@@ -100,49 +173,111 @@ def init_session(
         "ACCESS_TOKEN": token.access_token,
         "OBO_ACCESS_TOKEN": token.obo_access_token,
     }
-    # if header_token:
-    #     ctx_payload["USER_ASSERTION"] = header_token
-    SESSIONS[sessionId + "_ctx"] = ctx_payload
+    await session_store.create(
+        sid, history, {k: v for k, v in ctx_payload.items() if v is not None}
+    )
     return InitSessionResponse(sessionId=sessionId)
 
 
-@app.post("/chat", response_model=ChatResponse)
-def chat(
-    req: ChatRequest,
-    credentials: HTTPAuthorizationCredentials = Security(bearer_scheme),
-):
-    if req.sessionId not in SESSIONS:
-        raise HTTPException(status_code=404, detail="Invalid sessionId")
-
+async def _get_session_context(
+    req: ChatRequest, credentials: HTTPAuthorizationCredentials | None
+) -> Tuple[str, Dict[str, Any]]:
+    """Validate the session and caller token; return (sid, session_ctx)."""
     # Derive user_assertion: body value wins; fallback to Authorization header if present
     header_token = None
     if credentials and credentials.scheme.lower() == "bearer":
         header_token = credentials.credentials
 
-    history = SESSIONS[req.sessionId]
-    session_ctx = SESSIONS.get(req.sessionId + "_ctx", {})
-
-    # Check if header_token matches session's USER_ASSERTION
-    session_user_assertion = session_ctx.get("USER_ASSERTION")
-    if session_user_assertion and header_token != session_user_assertion:
+    # The signed session id binds the session to the caller's token and expiry
+    try:
+        sid = verify_session_id(req.sessionId, header_token)
+    except MalformedSessionId:
+        raise HTTPException(status_code=400, detail="Malformed sessionId")
+    except ExpiredSessionId:
+        raise HTTPException(status_code=404, detail="Session expired")
+    except SessionTokenMismatch:
         raise HTTPException(
             status_code=401, detail="Session terminated: token mismatch"
         )
 
-    # Apply per-session context before invoke
-    clear_context()
-    set_context(**{k: v for k, v in session_ctx.items() if v})
+    session_ctx = await session_store.get_context(sid)
+    if session_ctx is None:
+        raise HTTPException(status_code=404, detail="Invalid sessionId")
+    return sid, session_ctx
+
+
+def _last_human_id(messages: List[Any]) -> str | None:
+    return next((m.id for m in reversed(messages) if isinstance(m, HumanMessage)), None)
+
+
+async def _prepare_thread(sid: str, config: Dict[str, Any]):
+    """Seed, resync or trim the checkpointed thread before a new user turn.
+
+    Checkpoints are per worker while the session history is shared, so a thread
+    that is empty or whose last user turn differs from the history's (another
+    worker served the turns since) is rebuilt from the history. Otherwise messages
+    older than the last HISTORY_TURNS user turns are dropped.
+    """
+    snapshot = await get_graph().aget_state(config)
+    messages = snapshot.values.get("messages", [])
+    history = await session_store.get_messages(sid)
+    if not messages or _last_human_id(messages) != _last_human_id(history):
+        # The agent node supplies its own system prompt
+        history = [m for m in history if not isinstance(m, SystemMessage)]
+        if history:
+            await get_graph().aupdate_state(
+                config, {"messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), *history]}
+            )
+        return
+    turn_starts = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+    if len(turn_starts) <= HISTORY_TURNS:
+        return
+    # Cut at a human message so no tool result is separated from its tool call
+    window = messages[turn_starts[-HISTORY_TURNS] :]
+    await get_graph().aupdate_state(
+        config, {"messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), *window]}
+    )
+
+
+async def _final_reply(config: Dict[str, Any]) -> str:
+    """Return the text of the last assistant message in the checkpointed thread."""
+    snapshot = await get_graph().aget_state(config)
+    messages = snapshot.values.get("messages", [])
+    if not messages or not isinstance(messages[-1], AIMessage):
+        return ""
+    content = messages[-1].content
+    return content if isinstance(content, str) else ""
+
 
-    history.append(HumanMessage(content=req.message))
-    state = {"messages": history[-1]}  # Limit context to last message
-    config = {"configurable": {"thread_id": req.sessionId}}
-    result = graph_app.invoke(state, config=config)
+def _sse(payload: Any) -> bytes:
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(
+    req: ChatRequest,
+    credentials: HTTPAuthorizationCredentials = Security(bearer_scheme),
+):
+    sid, session_ctx = await _get_session_context(req, credentials)
+
+    human_msg = HumanMessage(content=req.message, id=str(uuid.uuid4()))
+    state = {"messages": human_msg}  # Limit context to last message
+    config = {"configurable": {"thread_id": sid}}
+    await _prepare_thread(sid, config)
+
+    # Apply per-session context for the duration of the invoke only
+    ctx_token = set_context(**{k: v for k, v in session_ctx.items() if v})
+    try:
+        result = await get_graph().ainvoke(state, config=config, durability=DURABILITY)
+    finally:
+        reset_context(ctx_token)
     new_messages = result["messages"]
 
     # LangGraph returns entire list; get only newly added tail piece(s)
     # For simplicity, take the last AI/Tool output message:
     reply_msg = new_messages[-1]
-    history.append(reply_msg)
+    await session_store.append_messages(sid, human_msg, reply_msg)
+    await session_store.trim(sid, keep_last=2 * HISTORY_TURNS)
 
     toolCalls = getattr(reply_msg, "toolCalls", None)
     reply_text = getattr(reply_msg, "content", "")
@@ -150,17 +285,104 @@ def chat(
     return ChatResponse(sessionId=req.sessionId, reply=reply_text, toolCalls=toolCalls)
 
 
+@app.post("/chat/stream")
+async def chat_stream(
+    req: ChatRequest,
+    credentials: HTTPAuthorizationCredentials = Security(bearer_scheme),
+):
+    """Stream the assistant reply as server-sent events.
+
+    Each event carries a JSON payload ``{"delta": "<text>"}``; the stream ends
+    with ``data: [DONE]``. The assembled reply is appended to the session history.
+    """
+    sid, session_ctx = await _get_session_context(req, credentials)
+
+    human_msg = HumanMessage(content=req.message, id=str(uuid.uuid4()))
+    state = {"messages": human_msg}  # Limit context to last message
+    config = {"configurable": {"thread_id": sid}}
+    await _prepare_thread(sid, config)
+
+    async def gen():
+        # Apply per-session context inside the generator, which runs after the handler returns
+        ctx_token = set_context(**{k: v for k, v in session_ctx.items() if v})
+        loop = asyncio.get_running_loop()
+        parts: List[str] = []
+        buf: List[str] = []
+        batch_size = STREAM_BATCH_START
+        last_flush = loop.time()
+        try:
+            async for event in get_graph().astream_events(
+                state, config=config, version="v2", durability=DURABILITY
+            ):
+                if event["event"] in STREAM_FLUSH_EVENTS:
+                    if buf:
+                        yield _sse({"delta": "".join(buf)})
+                        buf.clear()
+                        last_flush = loop.time()
+                    continue
+                if event["event"] == "on_chat_model_stream":
+                    delta = event["data"]["chunk"].content
+                elif (
+                    event["event"] == "on_custom_event" and event["name"] == REPLY_EVENT
+                ):
+                    # Replies a node makes up itself, such as the timeout apology
+                    delta = event["data"]["content"]
+                else:
+                    continue
+                if not delta:
+                    continue
+                parts.append(delta)
+                buf.append(delta)
+                if (
+                    len(buf) >= batch_size
+                    or loop.time() - last_flush > STREAM_FLUSH_INTERVAL
+                ):
+                    yield _sse({"delta": "".join(buf)})
+                    buf.clear()
+                    batch_size = min(batch_size * STREAM_BATCH_GROWTH, STREAM_BATCH_MAX)
+                    last_flush = loop.time()
+            if buf:
+                yield _sse({"delta": "".join(buf)})
+            if not parts:
+                # The reply was returned without streaming or a reply event
+                reply = await _final_reply(config)
+                if reply:
+                    parts.append(reply)
+                    yield _sse({"delta": reply})
+            yield b"data: [DONE]\n\n"
+        finally:
+            reset_context(ctx_token)
+            if parts:
+                await session_store.append_messages(
+                    sid, human_msg, AIMessage(content="".join(parts))
+                )
+                await session_store.trim(sid, keep_last=2 * HISTORY_TURNS)
+
+    return StreamingResponse(gen(), media_type="text/event-stream")
+
+
 if __name__ == "__main__":
-    # FastAPI apps are ASGI; use uvicorn to run the server instead of Flask's app.run
+    # FastAPI apps are ASGI; use uvicorn to run the server instead of Flask's app.run.
+    # In production prefer gunicorn with uvicorn workers: gunicorn -c gunicorn.conf.py api:app
     import uvicorn
 
     # Allow overriding port via PORT env var (common in cloud platforms)
     port = int(os.getenv("PORT", "8000"))
+    # Worker processes; more than one needs REDIS_URL so workers share sessions
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    if workers > 1 and not os.getenv("SESSION_SECRET"):
+        # Each spawned worker would sign session ids with its own random secret
+        raise SystemExit("SESSION_SECRET must be set when WEB_CONCURRENCY > 1")
     # reload=True is handy for local dev; keep False here for explicitness
     uvicorn.run(
-        app,
+        # uvicorn needs an import string to spawn multiple workers
+        "api:app" if workers > 1 else app,
         host="0.0.0.0",
         port=port,
         reload=False,
+        workers=workers,
+        # uvloop event loop and C-accelerated httptools parser (no uvloop on Windows)
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
         log_level="info",
     )
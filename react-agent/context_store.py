@@ -1,6 +1,12 @@
-from contextvars import ContextVar
+import os
+from contextvars import ContextVar, Token
+from types import MappingProxyType
 from typing import Any, Dict, Optional
 
+from dotenv import load_dotenv
+
+load_dotenv()
+
 # Context variables for per-request dynamic configuration
 _ctx: ContextVar[Dict[str, Any]] = ContextVar("sharepoint_context", default={})
 
@@ -13,21 +19,32 @@ CONFIG_KEYS = [
     "OBO_ACCESS_TOKEN",
 ]
 
+# Environment fallbacks for the config keys, read once at import
+_ENV = MappingProxyType(
+    {k: v for k in CONFIG_KEYS if (v := os.environ.get(k)) is not None}
+)
+
 
-def set_context(**kwargs) -> Dict[str, Any]:
+def set_context(**kwargs) -> Token:
     """Set multiple context values for the current request.
-    Only known config keys are stored. Returns the updated context dict.
+    Only known config keys are stored. Returns a token for reset_context().
     """
     current = dict(_ctx.get())
     for k, v in kwargs.items():
         if k in CONFIG_KEYS and v is not None:
             current[k] = v
-    _ctx.set(current)
-    return current
+    return _ctx.set(current)
+
+
+def reset_context(token: Token):
+    """Restore the context that was active before the matching set_context()."""
+    _ctx.reset(token)
 
 
 def get_context_value(key: str) -> Optional[str]:
-    return _ctx.get().get(key)
+    """Return ``key`` from the request context, falling back to the environment."""
+    value = _ctx.get().get(key)
+    return _ENV.get(key) if value is None else value
 
 
 def get_all_context() -> Dict[str, Any]:
@@ -0,0 +1,31 @@
+# gunicorn.conf.py
+# Production entrypoint: gunicorn -c gunicorn.conf.py api:app
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+# One uvicorn (uvloop + httptools) worker per core unless WEB_CONCURRENCY is pinned
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
+worker_connections = 1000
+timeout = 120
+# Import the app once in the master so workers share its memory copy-on-write
+preload_app = True
+
+
+def on_starting(server):
+    # Compile the agent graph before forking; lifespan then finds it already built
+    import api
+
+    api.get_graph()
+    if server.cfg.workers > 1 and not os.getenv("REDIS_URL"):
+        server.log.warning(
+            "REDIS_URL is not set; sessions are per worker and will not be found "
+            "when a request lands on a different worker"
+        )
+    if server.cfg.workers > 1 and not os.getenv("SESSION_SECRET"):
+        server.log.warning(
+            "SESSION_SECRET is not set; session ids are signed with a random "
+            "secret and stop validating after a restart, or across workers "
+            "if preload_app is turned off"
+        )
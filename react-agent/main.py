@@ -1,3 +1,4 @@
+import asyncio
 import os
 
 from dotenv import load_dotenv
@@ -23,7 +24,7 @@ def bootstrap():
         client_secret=os.environ["CLIENT_SECRET"],
         resource_url=os.environ["RESOURCE"],
         user_assertion=os.environ["USER_ASSERTION"],
-    )
+    ).load()
 
     site = SiteInfo(
         site_url=os.environ["SITE_URL"],
@@ -42,5 +43,7 @@ def bootstrap():
 
 if __name__ == "__main__":
     app = bootstrap()
-    res = app.invoke({"messages": [HumanMessage(content="get the site analytics")]})
+    res = asyncio.run(
+        app.ainvoke({"messages": [HumanMessage(content="get the site analytics")]})
+    )
     print(res["messages"][LAST].content)
@@ -1,6 +1,57 @@
+import asyncio
+import base64
+import hashlib
+import time
 import urllib.parse
+from collections import namedtuple
 
+import httpx
+import orjson
 import requests
+from cachetools import TLRUCache
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+)
+
+from services.http_client import async_client, session
+
+# (connect, read) timeouts for the blocking token requests
+REQUEST_TIMEOUT = (3, 10)
+
+# Retry a token request once on connection errors and timeouts
+_retry_transient = retry(
+    retry=retry_if_exception_type(
+        (httpx.TransportError, requests.ConnectionError, requests.Timeout)
+    ),
+    stop=stop_after_attempt(2),
+    wait=wait_exponential(multiplier=0.5, max=4),
+    reraise=True,
+)
+
+AccessTokens = namedtuple(
+    "AccessTokens", ["access_token", "obo_access_token", "expires_at"]
+)
+
+# Refresh cached tokens this many seconds before they actually expire
+TOKEN_EXPIRY_SKEW = 60
+
+# Tokens keyed by tenant/client/user, each entry evicted at its own expires_at
+_token_cache = TLRUCache(
+    maxsize=1024, ttu=lambda _key, tokens, _now: tokens.expires_at, timer=time.time
+)
+
+
+def _jwt_exp(token):
+    """Return the ``exp`` claim of a JWT, or None if it cannot be decoded."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return int(orjson.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
 
 
 class AcquireToken:
@@ -25,9 +76,106 @@ class AcquireToken:
         )
         self.headers = {"Content-Type": "application/x-www-form-urlencoded"}
         self.user_assertion = user_assertion
+        self.access_token = None
+        self.obo_access_token = None
+
+    @classmethod
+    async def create(cls, **kwargs) -> "AcquireToken":
+        """
+        Build an AcquireToken and fetch both access tokens concurrently.
+
+        Accepts the same keyword arguments as the constructor.
+        """
+        token = cls(**kwargs)
+        await token.aload()
+        return token
+
+    def load(self) -> "AcquireToken":
+        """
+        Fetch the app-only and OBO access tokens one after the other (blocking).
+        """
         self.access_token = self.get_access_token()
         self.obo_access_token = self.get_obo_access_token()
+        return self
+
+    async def aload(self) -> "AcquireToken":
+        """
+        Fetch the app-only and OBO access tokens concurrently.
+
+        Tokens are cached per tenant, client and user assertion until shortly
+        before the earliest ``exp`` claim (the assertion's included), so repeat
+        sessions skip both requests.
+        """
+        key = self._cache_key()
+        tokens = _token_cache.get(key)
+        if tokens is None:
+            access_token, obo_access_token = await asyncio.gather(
+                self._apost_token(self._client_credentials_body()),
+                self._apost_token(self._obo_body()),
+            )
+            tokens = AccessTokens(
+                access_token,
+                obo_access_token,
+                self._expires_at(access_token, obo_access_token),
+            )
+            if tokens.expires_at is not None and tokens.expires_at > time.time():
+                _token_cache[key] = tokens
+        self.access_token = tokens.access_token
+        self.obo_access_token = tokens.obo_access_token
+        return self
+
+    def _cache_key(self):
+        raw = "|".join(
+            [
+                self.tenant_id,
+                self.client_id,
+                self.resource_url,
+                self.user_assertion or "",
+            ]
+        )
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _expires_at(self, access_token, obo_access_token):
+        # Only cache complete results whose tokens all carry an exp claim. The user
+        # assertion counts too: once it expires its cached OBO token must not be served
+        if not access_token or (self.user_assertion and not obo_access_token):
+            return None
+        issued = [t for t in (access_token, obo_access_token, self.user_assertion) if t]
+        exps = [_jwt_exp(t) for t in issued]
+        if None in exps:
+            return None
+        return min(exps) - TOKEN_EXPIRY_SKEW
+
+    def _client_credentials_body(self):
+        # Body for the access token request
+        return {
+            "grant_type": "client_credentials",
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "scope": self.resource_url + ".default",
+        }
 
+    def _obo_body(self):
+        # Body for the On-Behalf-Of access token request
+        return {
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "grant_type": "urn:ietf:params:oauth:grant-type:jwt-bearer",
+            "requested_token_use": "on_behalf_of",
+            "assertion": self.user_assertion,
+            "scope": self.resource_url + ".default",
+        }
+
+    @_retry_transient
+    async def _apost_token(self, body):
+        response = await async_client.post(
+            self.base_url, headers=self.headers, data=body
+        )
+        return orjson.loads(response.content).get(
+            "access_token"
+        )  # Extract access token from the response
+
+    @_retry_transient
     def get_access_token(self):
         """
         This function retrieves an access token from Microsoft's OAuth2 endpoint.
@@ -38,18 +186,15 @@ class AcquireToken:
         Returns:
         str: The access token as a string. This token is used for authentication in subsequent API requests.
         """
-        # Body for the access token request
-        body = {
-            "grant_type": "client_credentials",
-            "client_id": self.client_id,
-            "client_secret": self.client_secret,
-            "scope": self.resource_url + ".default",
-        }
-        response = requests.post(self.base_url, headers=self.headers, data=body)
-        return response.json().get(
+        body = self._client_credentials_body()
+        response = session.post(
+            self.base_url, headers=self.headers, data=body, timeout=REQUEST_TIMEOUT
+        )
+        return orjson.loads(response.content).get(
             "access_token"
         )  # Extract access token from the response
 
+    @_retry_transient
     def get_obo_access_token(self):
         """
         This function retrieves an On-Behalf-Of (OBO) access token from Microsoft's OAuth2 endpoint.
@@ -60,16 +205,10 @@ class AcquireToken:
         Args:
             user_assertion (str): The user's access token that the application is acting on behalf of.
         """
-        # Body for the access token request
-        body = {
-            "client_id": self.client_id,
-            "client_secret": self.client_secret,
-            "grant_type": "urn:ietf:params:oauth:grant-type:jwt-bearer",
-            "requested_token_use": "on_behalf_of",
-            "assertion": self.user_assertion,
-            "scope": self.resource_url + ".default",
-        }
-        response = requests.post(self.base_url, headers=self.headers, data=body)
-        return response.json().get(
+        body = self._obo_body()
+        response = session.post(
+            self.base_url, headers=self.headers, data=body, timeout=REQUEST_TIMEOUT
+        )
+        return orjson.loads(response.content).get(
             "access_token"
         )  # Extract access token from the response
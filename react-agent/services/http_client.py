@@ -0,0 +1,57 @@
+import os
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Shared connection pools for the OAuth and Graph endpoints so repeated calls
+# reuse TLS connections instead of paying a fresh handshake each time
+POOL_CONNECTIONS = 32
+POOL_MAXSIZE = 128
+
+# Retry transient 5xx responses; only idempotent methods are retried and the last
+# response is returned, not raised. Throttling (429) is left to
+# SharePointClient._request, which waits out Retry-After for every method.
+RETRY = Retry(
+    total=3,
+    backoff_factor=0.2,
+    status_forcelist=[500, 502, 503, 504],
+    raise_on_status=False,
+)
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=RETRY
+    )
+    session.mount("https://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+
+# Blocking client used by AcquireToken, SiteInfo and SharePointClient
+session = _build_session()
+
+# Blocking HTTP/2 client: concurrent Graph calls (e.g. load_many) multiplex over one
+# TLS connection instead of holding one socket each
+http2_client = httpx.Client(
+    http2=True,
+    timeout=30.0,
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+)
+
+# Set GRAPH_HTTP2=1 to send SharePointClient calls through http2_client; the default
+# requests session additionally retries 5xx responses
+GRAPH_HTTP2 = os.getenv("GRAPH_HTTP2", "").lower() in ("1", "true", "yes")
+graph_client = http2_client if GRAPH_HTTP2 else session
+
+# Async client with HTTP/2 used by the async token path and AsyncSharePointClient
+async_client = httpx.AsyncClient(
+    http2=True,
+    timeout=httpx.Timeout(10.0, connect=3.0),
+    limits=httpx.Limits(
+        max_connections=POOL_MAXSIZE, max_keepalive_connections=POOL_CONNECTIONS
+    ),
+)
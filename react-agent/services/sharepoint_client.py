@@ -1,26 +1,170 @@
+import asyncio
+import contextlib
+import functools
+import hashlib
 import io
 import os
 import platform
+import tempfile
+import threading
+import time
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
-from typing import List, Optional, Union
+from typing import Any, List, Optional, Union
 
-import pandas as pd
+import httpx
+import orjson
 import requests
-from docx import Document as DocxDocument
+from cachetools import TTLCache
 from langchain_community.document_loaders.parsers.pdf import PyPDFParser
 from langchain_core.document_loaders import Blob
 from langchain_core.document_loaders.base import BaseLoader
 from langchain_core.documents.base import Document
-from pptx import Presentation
+
+from services.http_client import async_client as shared_async_client
+from services.http_client import graph_client
+
+# Drive and folder ids change on the order of days; cache them per caller token
+ID_CACHE_TTL_SECONDS = 60 * 60
+# (site_id, token hash) -> {lowercased drive name: drive id}
+_drive_ids_cache = TTLCache(maxsize=1024, ttl=ID_CACHE_TTL_SECONDS)
+# (drive_id, folder_path, token hash) -> folder id
+_folder_id_cache = TTLCache(maxsize=1024, ttl=ID_CACHE_TTL_SECONDS)
+# OBO token hash -> id of that user's OneDrive
+_one_drive_id_cache = TTLCache(maxsize=1024, ttl=ID_CACHE_TTL_SECONDS)
+_id_cache_lock = threading.Lock()
+
+# (url, token hash) -> (etag, last 200 response) for conditional GETs of Graph metadata
+ETAG_CACHE_TTL_SECONDS = 24 * 60 * 60
+_etag_cache = TTLCache(maxsize=1024, ttl=ETAG_CACHE_TTL_SECONDS)
+_etag_lock = threading.Lock()
+
+# (drive_id, token hash) -> latest delta token, so repeat syncs only fetch changes
+_delta_tokens = TTLCache(maxsize=256, ttl=ETAG_CACHE_TTL_SECONDS)
+_delta_lock = threading.Lock()
+
+# DriveItem fields read by callers; $select keeps listing payloads to a few hundred bytes per item
+DRIVE_ITEM_SELECT = "id,name,size,webUrl,file,folder,parentReference,createdBy,lastModifiedBy,lastModifiedDateTime"
+# Fields needed to download and dispatch a file to its loader
+DOWNLOAD_SELECT = "id,name,file,@microsoft.graph.downloadUrl"
+# Largest page Graph serves, so paginated listings take as few round trips as possible
+GRAPH_MAX_PAGE_SIZE = 999
+
+
+def _search_page_size(top):
+    # Search results include folders, which are dropped, so ask for some slack
+    return min(max(top * 2, 20), GRAPH_MAX_PAGE_SIZE)
+
+
+# Maximum number of sub-requests Graph accepts in one /$batch call
+GRAPH_BATCH_LIMIT = 20
+
+# Times a throttled (429) Graph request is retried after sleeping for Retry-After
+GRAPH_THROTTLE_RETRIES = 3
+
+# Downloads are buffered in memory up to this size, then spill to a temp file
+DOWNLOAD_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def _retry_after(resp):
+    # Seconds Graph asks us to wait before retrying a throttled request
+    try:
+        return max(float(resp.headers.get("Retry-After", "1")), 0.0)
+    except ValueError:
+        return 1.0
+
+
+def _token_hash(token):
+    # Cache keys include the caller's token hash so results never leak across users
+    return hashlib.sha256((token or "").encode()).hexdigest()
 
 
 class SharePointClient:
-    def __init__(self, site_url, site_id, access_token, obo_access_token):
+    def __init__(
+        self,
+        site_url,
+        site_id,
+        access_token,
+        obo_access_token,
+        session: Optional[Union[requests.Session, httpx.Client]] = None,
+    ):
         self.site_url = site_url
         self.site_id = site_id
         self.access_token = access_token
         self.obo_access_token = obo_access_token
+        # Built once and passed by reference: app-only token for site resources,
+        # delegated (OBO) token for user-scoped calls
+        self._app_headers = {"Authorization": f"Bearer {access_token}"}
+        self._user_headers = {
+            "Authorization": f"Bearer {obo_access_token}",
+            "Content-Type": "application/json",
+        }
+        # Reuse the process-wide keep-alive pool unless the caller supplies one; either
+        # a requests.Session or an httpx.Client (see GRAPH_HTTP2 in services.http_client)
+        self.session = session or graph_client
+
+    def _request(self, method, url, **kwargs):
+        """Send a Graph request, waiting out 429 throttling as directed by Retry-After."""
+        for attempt in range(GRAPH_THROTTLE_RETRIES + 1):
+            resp = self.session.request(method, url, **kwargs)
+            if resp.status_code != 429 or attempt == GRAPH_THROTTLE_RETRIES:
+                return resp
+            time.sleep(_retry_after(resp))
+
+    def _get(self, url, headers, **kwargs):
+        # Headers are passed per request since calls alternate between app and OBO tokens
+        return self._request("GET", url, headers=headers, **kwargs)
+
+    def _iter_download(self, url, headers):
+        # Yield the response body in chunks with whichever HTTP client backs this instance
+        if isinstance(self.session, httpx.Client):
+            # format=pdf conversions answer with a redirect to the converted file
+            with self.session.stream(
+                "GET", url, headers=headers, follow_redirects=True
+            ) as response:
+                response.raise_for_status()
+                yield from response.iter_bytes(chunk_size=DOWNLOAD_CHUNK_SIZE)
+            return
+        with self.session.get(url, headers=headers, stream=True) as response:
+            # Error bodies must not reach a loader as if they were the file
+            response.raise_for_status()
+            # iter_content (unlike response.raw) also undoes any transfer encoding
+            yield from response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE)
+
+    def _spool_download(self, url, headers):
+        # Stream the file content into a spooled temp file, which stays in memory for
+        # small files and rolls over to disk for large ones
+        stream = tempfile.SpooledTemporaryFile(max_size=DOWNLOAD_SPOOL_MAX_SIZE)
+        try:
+            for chunk in self._iter_download(url, headers):
+                stream.write(chunk)
+        except BaseException:
+            stream.close()
+            raise
+        stream.seek(0)
+        return stream
+
+    def _cached_get(self, url, headers):
+        """GET a rarely-changing Graph resource, revalidating a cached copy with If-None-Match.
+
+        On 304 Not Modified the cached 200 response is returned, so callers handle
+        both cases alike. Not for responses with short-lived fields such as download URLs.
+        """
+        key = (url, _token_hash(headers["Authorization"]))
+        with _etag_lock:
+            cached = _etag_cache.get(key)
+        if cached is not None:
+            headers = {**headers, "If-None-Match": cached[0]}
+        resp = self._request("GET", url, headers=headers)
+        if resp.status_code == 304 and cached is not None:
+            return cached[1]
+        etag = resp.headers.get("ETag")
+        if resp.status_code == 200 and etag:
+            with _etag_lock:
+                _etag_cache[key] = (etag, resp)
+        return resp
 
     def get_one_drive_id(self):
         """
@@ -29,11 +173,20 @@ class SharePointClient:
         Returns:
         str: The OneDrive ID of the current user.
         """
-        url = "https://graph.microsoft.com/v1.0/me/drive"
-        headers = {"Authorization": f"Bearer {self.obo_access_token}"}
-        resp = requests.get(url, headers=headers)
+        cache_key = _token_hash(self.obo_access_token)
+        with _id_cache_lock:
+            drive_id = _one_drive_id_cache.get(cache_key)
+        if drive_id is not None:
+            return drive_id
+
+        url = "https://graph.microsoft.com/v1.0/me/drive?$select=id"
+        resp = self._get(url, self._user_headers)
         if resp.status_code == 200:
-            return resp.json().get("id")
+            drive_id = orjson.loads(resp.content).get("id")
+            if drive_id:
+                with _id_cache_lock:
+                    _one_drive_id_cache[cache_key] = drive_id
+            return drive_id
         else:
             print(f"Error fetching OneDrive ID: {resp.status_code} - {resp.text}")
             return None
@@ -46,18 +199,31 @@ class SharePointClient:
         Returns:
             str: The ID of the drive on the SharePoint site
         """
-
-        url = f"https://graph.microsoft.com/v1.0/sites/{self.site_id}/drives"
-        headers = {"Authorization": f"Bearer {self.access_token}"}
-        resp = requests.get(url, headers=headers)
+        drive_ids = self._get_drive_ids()
+        if drive_ids is None:
+            return None
+        return drive_ids.get(library_name.lower())
+
+    def _get_drive_ids(self):
+        # Map of lowercased drive name -> drive id for this site, cached for ID_CACHE_TTL_SECONDS
+        cache_key = (self.site_id, _token_hash(self.access_token))
+        with _id_cache_lock:
+            drive_ids = _drive_ids_cache.get(cache_key)
+        if drive_ids is not None:
+            return drive_ids
+
+        url = f"https://graph.microsoft.com/v1.0/sites/{self.site_id}/drives?$select=id,name"
+        resp = self._cached_get(url, self._app_headers)
         if resp.status_code != 200:
             print(f"Error listing drives: {resp.status_code} - {resp.text}")
             return None
-        for drive in resp.json().get("value", []):
-            if drive.get("name", "").lower() == library_name.lower():
-                return drive.get("id")
-
-        return None
+        drive_ids = {}
+        for drive in orjson.loads(resp.content).get("value", []):
+            # Keep the first drive for a name, as the linear scan did
+            drive_ids.setdefault(drive.get("name", "").lower(), drive.get("id"))
+        with _id_cache_lock:
+            _drive_ids_cache[cache_key] = drive_ids
+        return drive_ids
 
     def get_folder_id(self, drive_id, folder_path):
         """
@@ -66,16 +232,25 @@ class SharePointClient:
         if not drive_id:
             return None
 
+        cache_key = (drive_id, folder_path or "", _token_hash(self.access_token))
+        with _id_cache_lock:
+            folder_id = _folder_id_cache.get(cache_key)
+        if folder_id is not None:
+            return folder_id
+
         if not folder_path or folder_path == "":
             url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/root"
         else:
             encoded_path = urllib.parse.quote(folder_path)
             url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/root:/{encoded_path}"
 
-        headers = {"Authorization": f"Bearer {self.access_token}"}
-        resp = requests.get(url, headers=headers)
+        resp = self._cached_get(url, self._app_headers)
         if resp.status_code == 200:
-            return resp.json().get("id")
+            folder_id = orjson.loads(resp.content).get("id")
+            if folder_id:
+                with _id_cache_lock:
+                    _folder_id_cache[cache_key] = folder_id
+            return folder_id
         else:
             print(
                 f"Error fetching folder '{folder_path}': {resp.status_code} - {resp.text}"
@@ -93,11 +268,9 @@ class SharePointClient:
         Returns:
         str: The ID of the specified file.
         """
-        files_url = f"https://graph.microsoft.com/v1.0/sites/{self.site_id}/drives/{drive_id}/root/children"
-        response = requests.get(
-            files_url, headers={"Authorization": f"Bearer {self.access_token}"}
-        )
-        items_data = response.json()
+        files_url = f"https://graph.microsoft.com/v1.0/sites/{self.site_id}/drives/{drive_id}/root/children?$select=id,name&$top={GRAPH_MAX_PAGE_SIZE}"
+        response = self._cached_get(files_url, self._app_headers)
+        items_data = orjson.loads(response.content)
 
         for item in items_data["value"]:
             if item["name"] == file_name:
@@ -113,18 +286,19 @@ class SharePointClient:
             top (int): Number of recent files to retrieve (default: 5)
 
         Returns:
-            list: List of file metadata dictionaries.
+            list: Up to ``top`` file metadata dictionaries, newest first. ``top`` is
+            sent to Graph as the page size and paging stops once enough files are
+            collected; ``$select`` limits each item to DRIVE_ITEM_SELECT.
         """
-        url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/root/search(q='{file_name}')?$orderby=lastModifiedDateTime desc&$top={max(top*2, 20)}"
-        headers = {
-            "Authorization": f"Bearer {self.obo_access_token}",
-            "Content-Type": "application/json",
-        }
+        if top <= 0:
+            return []
+        url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/root/search(q='{file_name}')?$orderby=lastModifiedDateTime desc&$top={_search_page_size(top)}&$select={DRIVE_ITEM_SELECT}"
+        headers = self._user_headers
         files = []
-        while url:
-            resp = requests.get(url, headers=headers)
+        while url and len(files) < top:
+            resp = self._request("GET", url, headers=headers)
             if resp.status_code == 200:
-                data = resp.json()
+                data = orjson.loads(resp.content)
                 # Only include items that are files (not folders)
                 files.extend(
                     [item for item in data.get("value", []) if "folder" not in item]
@@ -133,7 +307,52 @@ class SharePointClient:
             else:
                 print(f"Error: {resp.status_code} - {resp.text}")
                 break
-        return files
+        return files[:top]
+
+    def get_changed_files(self, drive_id, delta_token=None):
+        """
+        Get files added, changed or deleted in a drive since the last delta sync.
+
+        The first call (no stored or given token) returns every file in the drive;
+        later calls return only the changes. The newest delta token is remembered
+        per drive and user, so callers need not keep it themselves.
+
+        Args:
+            drive_id (str): The ID of the document library (drive).
+            delta_token (str): Token from a previous call; defaults to the stored one.
+
+        Returns:
+            tuple: (list of file metadata dictionaries, new delta token). Deleted
+            files carry a "deleted" facet.
+        """
+        key = (drive_id, _token_hash(self.obo_access_token))
+        if delta_token is None:
+            with _delta_lock:
+                delta_token = _delta_tokens.get(key)
+
+        url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/root/delta?$select={DRIVE_ITEM_SELECT},deleted"
+        if delta_token:
+            url += f"&token={urllib.parse.quote(delta_token)}"
+
+        files = []
+        new_token = None
+        while url:
+            resp = self._get(url, self._user_headers)
+            if resp.status_code != 200:
+                print(f"Error: {resp.status_code} - {resp.text}")
+                return files, delta_token
+            data = orjson.loads(resp.content)
+            files.extend(item for item in data.get("value", []) if "folder" not in item)
+            url = data.get("@odata.nextLink")
+            delta_link = data.get("@odata.deltaLink")
+            if delta_link:
+                query = urllib.parse.parse_qs(urllib.parse.urlparse(delta_link).query)
+                new_token = query.get("token", [None])[0]
+
+        if new_token:
+            with _delta_lock:
+                _delta_tokens[key] = new_token
+        return files, new_token
 
     def get_recent_onedrive_files(self, file_name=".", top=5):
         """
@@ -144,17 +363,17 @@ class SharePointClient:
             top (int): Number of recent files to retrieve (default: 5)
 
         Returns:
-            list: List of recent files with metadata
+            list: Up to ``top`` recent files with metadata, from a single page of
+            Graph results limited to DRIVE_ITEM_SELECT fields
         """
-        url = f"https://graph.microsoft.com/v1.0/me/drive/root/search(q='{file_name}')?$orderby=lastModifiedDateTime desc&$top={max(top*2, 20)}"
-        headers = {
-            "Authorization": f"Bearer {self.obo_access_token}",
-            "Content-Type": "application/json",
-        }
+        if top <= 0:
+            return []
+        url = f"https://graph.microsoft.com/v1.0/me/drive/root/search(q='{file_name}')?$orderby=lastModifiedDateTime desc&$top={_search_page_size(top)}&$select={DRIVE_ITEM_SELECT}"
+        headers = self._user_headers
 
-        response = requests.get(url, headers=headers)
+        response = self._request("GET", url, headers=headers)
         if response.status_code == 200:
-            items = response.json().get("value", [])
+            items = orjson.loads(response.content).get("value", [])
             # Filter out folders
             files = [item for item in items if "folder" not in item]
             # Return only up to 'top' files
@@ -175,19 +394,60 @@ class SharePointClient:
 
         url = f"https://graph.microsoft.com/v1.0/me/drive/items/{file_id}/copy?@microsoft.graph.conflictBehavior=replace"
 
-        headers = {
-            "Authorization": f"Bearer {self.obo_access_token}",
-            "Content-Type": "application/json",
-        }
+        headers = self._user_headers
 
         body = {"parentReference": {"driveId": drive_id, "id": folder_id}}
 
-        response = requests.post(url, headers=headers, json=body)
+        response = self._request("POST", url, headers=headers, json=body)
 
         if response.status_code == 202:
             print("File copy initiated successfully.")
+            # Graph reports progress at this monitor URL until the copy finishes
+            return response.headers.get("Location")
         else:
             print(f"Error: {response.status_code} - {response.text}")
+            return None
+
+    def wait_for_copy(self, monitor_url, poll_interval=1.0, timeout=60):
+        """
+        Poll the monitor URL returned by copyfile until the copy completes or fails.
+
+        Args:
+            monitor_url (str): The monitor URL returned by copyfile.
+            poll_interval (float): Initial delay between polls in seconds; doubles per poll up to 8s.
+            timeout (float): Maximum number of seconds to wait (default: 60).
+
+        Returns:
+            dict: The final monitor status (``status`` is "completed" or "failed"), or None on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        # The monitor URL is pre-authenticated; once done it may redirect to the new
+        # item, which needs a token, so the redirect is read rather than followed
+        if isinstance(self.session, httpx.Client):
+            no_redirects = {"follow_redirects": False}
+        else:
+            no_redirects = {"allow_redirects": False}
+        while True:
+            resp = self._request("GET", monitor_url, **no_redirects)
+            if resp.status_code in (302, 303):
+                location = resp.headers.get("Location", "").rstrip("/")
+                return {
+                    "status": "completed",
+                    "resourceId": location.rsplit("/", 1)[-1],
+                }
+            if resp.status_code in (200, 202):
+                status = orjson.loads(resp.content)
+                # A completed status carries the new item's id as resourceId
+                if status.get("status") in ("completed", "failed"):
+                    return status
+            else:
+                print(f"Error polling copy: {resp.status_code} - {resp.text}")
+                return None
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(poll_interval, remaining))
+            poll_interval = min(poll_interval * 2, 8.0)
 
     def get_file_download_url(self, drive_id, file_id):
         """
@@ -205,18 +465,24 @@ class SharePointClient:
             file_url = (
                 f"https://graph.microsoft.com/v1.0/drives/{drive_id}/items/{file_id}"
             )
-            headers = {"Authorization": f"Bearer {self.obo_access_token}"}
-            response = requests.get(file_url, headers=headers)
-            file_data = response.json()
-
-            # Get the download URL and file name
-            download_url = file_data["@microsoft.graph.downloadUrl"]
-            file_name = file_data["name"]
-
-            return download_url
-
-        except requests.exceptions.RequestException as e:
-            print(f"Error downloading file: {file_name} err: {e}")
+            response = self._get(file_url, self._user_headers)
+            if response.status_code != 200:
+                print(
+                    f"Error fetching download URL for file {file_id}: "
+                    f"{response.status_code} - {response.text}"
+                )
+                return None
+            file_data = orjson.loads(response.content)
+
+            # Get the download URL
+            return file_data.get("@microsoft.graph.downloadUrl")
+
+        except (
+            requests.exceptions.RequestException,
+            httpx.HTTPError,
+            orjson.JSONDecodeError,
+        ) as e:
+            print(f"Error fetching download URL for file {file_id}: {e}")
             return None
 
     def get_site_analytics(self):
@@ -227,13 +493,10 @@ class SharePointClient:
             dict: A dictionary containing site usage analytics data.
         """
         url = f"https://graph.microsoft.com/v1.0/sites/{self.site_id}/analytics/allTime"
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json",
-        }
-        resp = requests.get(url, headers=headers)
+        headers = self._app_headers
+        resp = self._request("GET", url, headers=headers)
         if resp.status_code == 200:
-            return resp.json()
+            return orjson.loads(resp.content)
         else:
             print(f"Error fetching site analytics: {resp.status_code} - {resp.text}")
             return None
@@ -246,34 +509,77 @@ class SharePointClient:
             drive_id (str): The ID of the document library (drive).
             file_id (str): The ID of the file to update.
             metadata (dict): A dictionary of metadata fields to update.
+
+        Returns:
+            dict: The updated fields.
+
+        Raises:
+            HTTPError: If Graph rejects the update (e.g. unknown item or field, no access).
         """
-        headers = {
-            "Authorization": f"Bearer {self.obo_access_token}",
-            "Content-Type": "application/json",
-        }
+        headers = self._user_headers
 
-        # 1. Get listItemId
-        url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/items/{file_id}?expand=listItem"
-        r = requests.get(url, headers=headers)
-        r.raise_for_status()
-        list_item_id = r.json()["listItem"]["id"]
-
-        # 2. Get listId
-        url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/list"
-        r = requests.get(url, headers=headers)
-        r.raise_for_status()
-        list_id = r.json()["id"]
-
-        # 3. Patch metadata
-        url = f"https://graph.microsoft.com/v1.0/sites/{self.site_id}/lists/{list_id}/items/{list_item_id}/fields"
-        r = requests.patch(url, headers=headers, json=metadata)
-
-        if r.status_code == 200:
-            print("Metadata updated successfully")
-            return r.json()
-        else:
-            print(f"Error updating metadata: {r.status_code} - {r.text}")
-            return None
+        # Patch the fields through the drive item's listItem relationship, which resolves
+        # the list and list item server-side instead of looking them up first
+        url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/items/{file_id}/listItem/fields"
+        r = self._request("PATCH", url, headers=headers, json=metadata)
+
+        if r.status_code != 200:
+            raise requests.HTTPError(
+                f"Error updating metadata: {r.status_code} - {r.text}", response=r
+            )
+        print("Metadata updated successfully")
+        return orjson.loads(r.content)
+
+    def update_file_metadata_many(self, drive_id, updates: dict):
+        """
+        Update metadata of several files in a document library using Graph JSON batching.
+
+        Up to GRAPH_BATCH_LIMIT updates are sent per /$batch request.
+
+        Args:
+            drive_id (str): The ID of the document library (drive).
+            updates (dict): Maps each file ID to the dictionary of metadata fields to update.
+
+        Returns:
+            dict: The updated fields per file ID, or None for files whose update failed.
+        """
+        headers = self._user_headers
+        file_ids = list(updates)
+        results = {}
+        for start in range(0, len(file_ids), GRAPH_BATCH_LIMIT):
+            chunk = file_ids[start : start + GRAPH_BATCH_LIMIT]
+            body = {
+                "requests": [
+                    {
+                        "id": str(i),
+                        "method": "PATCH",
+                        "url": f"/drives/{drive_id}/items/{file_id}/listItem/fields",
+                        "body": updates[file_id],
+                        "headers": {"Content-Type": "application/json"},
+                    }
+                    for i, file_id in enumerate(chunk)
+                ]
+            }
+            r = self._request(
+                "POST",
+                "https://graph.microsoft.com/v1.0/$batch",
+                headers=headers,
+                json=body,
+            )
+            if r.status_code != 200:
+                print(f"Error updating metadata: {r.status_code} - {r.text}")
+                results.update(dict.fromkeys(chunk))
+                continue
+            for sub in orjson.loads(r.content).get("responses", []):
+                file_id = chunk[int(sub["id"])]
+                if sub.get("status") == 200:
+                    results[file_id] = sub.get("body")
+                else:
+                    print(
+                        f"Error updating metadata for {file_id}: {sub.get('status')} - {sub.get('body')}"
+                    )
+                    results[file_id] = None
+        return results
 
     def load_sharepoint_document_by_name(self, drive_id, file_name):
         """
@@ -287,16 +593,14 @@ class SharePointClient:
             object: A custom loader object that can handle the content of the loaded file. The type of the loader depends on the file type.
         """
         # Get the download URL and the file name by querying the Microsoft Graph API
-        file_url = (
-            f"https://graph.microsoft.com/v1.0/drives/{drive_id}/root:/{file_name}"
-        )
-        headers = {
-            "Authorization": f"Bearer {self.access_token}"
-        }  # Use the stored access token for authorization
-        response = requests.get(
-            file_url, headers=headers
+        file_url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/root:/{file_name}?$select={DOWNLOAD_SELECT}"
+        headers = self._app_headers  # Use the stored access token for authorization
+        response = self._request(
+            "GET", file_url, headers=headers
         )  # Make the HTTP request to get file details
-        file_data = response.json()  # Parse the JSON response to get file data
+        file_data = orjson.loads(
+            response.content
+        )  # Parse the JSON response to get file data
 
         file_type = file_data.get("file", {}).get(
             "mimeType", ""
@@ -305,49 +609,262 @@ class SharePointClient:
             "@microsoft.graph.downloadUrl"
         ]  # Extract the direct download URL from the response
 
-        # Get the file content from the download URL
-        response = requests.get(
-            download_url, headers=headers
-        )  # Make the HTTP request to download the file
+        if file_type not in LOADER_MIME_TYPES and _convertible_to_pdf(file_name):
+            # No local parser for this format (e.g. legacy .doc/.ppt/.xls, .rtf, .odt);
+            # let Graph convert it and parse the PDF instead
+            pdf_url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/items/{file_data['id']}/content?format=pdf"
+            try:
+                stream = self._spool_download(pdf_url, headers)
+                return _loader_for("application/pdf", stream, file_name)
+            except (requests.HTTPError, httpx.HTTPStatusError):
+                # Graph could not convert this file (e.g. 406); load it as it is
+                pass
+
+        stream = self._spool_download(download_url, headers)
+        return _loader_for(file_type, stream, file_name)
+
+    def load_many(self, drive_id, file_names, max_workers=8):
+        """
+        Load several documents concurrently with a thread pool.
 
-        # Create a BytesIO object from the response content, which allows for reading and writing bytes in memory
-        stream = io.BytesIO(
-            response.content
-        )  # This is useful for handling binary data like files without saving to disk
-
-        # Check the file type and use the appropriate custom loader to handle the file content
-        if file_type == "application/pdf":
-            # Use CustomPDFLoader to handle PDF files; it initializes with the stream and file name
-            loader = CustomPDFLoader(stream, file_name)
-            return loader
-        elif (
-            file_type
-            == "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        ):
-            # Use CustomWordLoader for Word documents to handle and potentially split the document's content
-            loader = CustomWordLoader(stream, file_name)
-            return loader
-        elif (
-            file_type
-            == "application/vnd.openxmlformats-officedocument.presentationml.presentation"
-        ):
-            # Use CustomPPTLoader for PowerPoint presentations to read and split the presentation into slides
-            loader = CustomPPTLoader(stream, file_name)
-            return loader
-        elif (
-            file_type
-            == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        ):
-            # Use CustomExcelLoader for Excel spreadsheets to read and possibly split the sheets into separate parts
-            loader = CustomExcelLoader(stream, file_name)
-            return loader
-        elif file_type in ["text/csv", "text/plain"]:
-            # Use CustomTextLoader for plain text or CSV files to handle and split text as needed
-            loader = CustomTextLoader(stream, file_name)
-            return loader
-        else:
-            print(f"Unsupported file type: {file_type}")
-            pass  # Placeholder for additional file types that may need to be implemented in the future
+        Only the downloads run in parallel; the returned loaders parse when
+        load_and_split is called, and that CPU-bound work still serializes on the GIL.
+        max_workers should not exceed the session's pool size (POOL_MAXSIZE).
+
+        Args:
+            drive_id (str): The ID of the drive on the SharePoint site.
+            file_names (list): Names of the files to load.
+            max_workers (int): Maximum number of concurrent downloads (default: 8).
+
+        Returns:
+            list: One loader (or None for unsupported types) per file, in input order.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as ex:
+            return list(
+                ex.map(
+                    lambda name: self.load_sharepoint_document_by_name(drive_id, name),
+                    file_names,
+                )
+            )
+
+
+class AsyncSharePointClient:
+    """
+    Async counterpart of SharePointClient for bulk Graph I/O.
+
+    Requests go through the shared HTTP/2 httpx client so many downloads overlap on a
+    few connections; at most ``max_concurrency`` files are fetched at once and parsing
+    runs in the default executor so it overlaps further downloads.
+    """
+
+    def __init__(
+        self,
+        site_url,
+        site_id,
+        access_token,
+        obo_access_token,
+        client: Optional[httpx.AsyncClient] = None,
+        max_concurrency: int = 8,
+    ):
+        self.site_url = site_url
+        self.site_id = site_id
+        self.access_token = access_token
+        self.obo_access_token = obo_access_token
+        self.client = client or shared_async_client
+        self.max_concurrency = max_concurrency
+        self._app_headers = {"Authorization": f"Bearer {access_token}"}
+        self._user_headers = {"Authorization": f"Bearer {obo_access_token}"}
+
+    async def _get(self, url, headers):
+        for attempt in range(GRAPH_THROTTLE_RETRIES + 1):
+            resp = await self.client.get(url, headers=headers)
+            if resp.status_code != 429 or attempt == GRAPH_THROTTLE_RETRIES:
+                return resp
+            await asyncio.sleep(_retry_after(resp))
+
+    async def _aiter_items(self, url, headers):
+        # Follow @odata.nextLink until the last page
+        while url:
+            resp = await self._get(url, headers)
+            if resp.status_code != 200:
+                print(f"Error: {resp.status_code} - {resp.text}")
+                return
+            data = orjson.loads(resp.content)
+            for item in data.get("value", []):
+                yield item
+            url = data.get("@odata.nextLink")
+
+    async def aget_all_files_in_drive(self, drive_id, file_name=".", top=5):
+        """
+        Async version of SharePointClient.get_all_files_in_drive.
+
+        Returns:
+            list: Up to ``top`` file metadata dictionaries.
+        """
+        files = []
+        if top <= 0:
+            return files
+        url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/root/search(q='{file_name}')?$orderby=lastModifiedDateTime desc&$top={_search_page_size(top)}&$select={DRIVE_ITEM_SELECT}"
+        async for item in self._aiter_items(url, self._user_headers):
+            if "folder" not in item:
+                files.append(item)
+                if len(files) == top:
+                    break
+        return files
+
+    async def _fetch_and_parse(self, semaphore, drive_id, file_name, text_splitter):
+        # A file that cannot be fetched is skipped (None) rather than failing the batch
+        try:
+            async with semaphore:
+                file_url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/root:/{file_name}?$select={DOWNLOAD_SELECT}"
+                resp = await self._get(file_url, self._app_headers)
+                resp.raise_for_status()
+                file_data = orjson.loads(resp.content)
+                file_type = file_data.get("file", {}).get("mimeType", "")
+                resp = await self._get(
+                    file_data["@microsoft.graph.downloadUrl"], self._app_headers
+                )
+                resp.raise_for_status()
+                content = resp.content
+        except (httpx.HTTPError, orjson.JSONDecodeError, KeyError) as e:
+            print(f"Error fetching '{file_name}': {e}")
+            return None
+
+        loader = _loader_for(file_type, io.BytesIO(content), file_name)
+        if loader is None:
+            return None
+        # Parsing is CPU-bound; keep it off the event loop
+        return await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(loader.load_and_split, text_splitter=text_splitter)
+        )
+
+    async def aload_documents(self, drive_id, file_names, text_splitter=None):
+        """
+        Download and parse several files from a drive concurrently.
+
+        Args:
+            drive_id (str): The ID of the drive on the SharePoint site.
+            file_names (list): Names of the files to load.
+            text_splitter: Optional splitter passed to each loader's load_and_split.
+
+        Returns:
+            list: One list of documents per file, in input order (None for files that
+            could not be fetched or have an unsupported type).
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with asyncio.TaskGroup() as tg:
+            tasks = [
+                tg.create_task(
+                    self._fetch_and_parse(semaphore, drive_id, name, text_splitter)
+                )
+                for name in file_names
+            ]
+        return [task.result() for task in tasks]
+
+
+# MIME types handled by _loader_for
+LOADER_MIME_TYPES = frozenset(
+    {
+        "application/pdf",
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "text/csv",
+        "text/plain",
+    }
+)
+
+# Extensions Graph can convert with /content?format=pdf
+PDF_CONVERTIBLE_EXTENSIONS = frozenset(
+    {
+        "doc",
+        "docx",
+        "dot",
+        "dotx",
+        "dotm",
+        "eml",
+        "epub",
+        "htm",
+        "html",
+        "md",
+        "markdown",
+        "msg",
+        "odp",
+        "ods",
+        "odt",
+        "pps",
+        "ppsx",
+        "ppt",
+        "pptx",
+        "rtf",
+        "xls",
+        "xlsm",
+        "xlsx",
+    }
+)
+
+
+def _convertible_to_pdf(file_name):
+    return (
+        os.path.splitext(file_name)[1].lstrip(".").lower() in PDF_CONVERTIBLE_EXTENSIONS
+    )
+
+
+def _loader_for(file_type, stream, file_name):
+    """Return the custom loader for a MIME type, or None if the type is unsupported."""
+    # Check the file type and use the appropriate custom loader to handle the file content
+    if file_type == "application/pdf":
+        # Use CustomPDFLoader to handle PDF files; it initializes with the stream and file name
+        loader = CustomPDFLoader(stream, file_name)
+        return loader
+    elif (
+        file_type
+        == "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+    ):
+        # Use CustomWordLoader for Word documents to handle and potentially split the document's content
+        loader = CustomWordLoader(stream, file_name)
+        return loader
+    elif (
+        file_type
+        == "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+    ):
+        # Use CustomPPTLoader for PowerPoint presentations to read and split the presentation into slides
+        loader = CustomPPTLoader(stream, file_name)
+        return loader
+    elif (
+        file_type == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    ):
+        # Use CustomExcelLoader for Excel spreadsheets to read and possibly split the sheets into separate parts
+        loader = CustomExcelLoader(stream, file_name)
+        return loader
+    elif file_type in ["text/csv", "text/plain"]:
+        # Use CustomTextLoader for plain text or CSV files to handle and split text as needed
+        loader = CustomTextLoader(stream, file_name)
+        return loader
+    else:
+        print(f"Unsupported file type: {file_type}")
+        # Placeholder for additional file types that may need to be implemented in the future
+        return None
+
+
+@functools.lru_cache(maxsize=32)
+def _pdf_parser(password, extract_images):
+    # PyPDFParser only holds its settings, so one instance can serve every file
+    return PyPDFParser(password=password, extract_images=extract_images)
+
+
+class _StreamBlob(Blob):
+    """Blob that hands the parser an open binary stream instead of a copy of its bytes.
+
+    ``path`` only labels the blob; the data is always read from ``stream``.
+    """
+
+    stream: Any
+
+    @contextlib.contextmanager
+    def as_bytes_io(self):
+        self.stream.seek(0)
+        yield self.stream
 
 
 class CustomPDFLoader(BaseLoader):
@@ -371,12 +888,14 @@ class CustomPDFLoader(BaseLoader):
         # Initialize with a binary stream, file name, optional password, and an image extraction flag
         self.stream = stream
         self.filename = filename
-        # Initialize a PDF parser with optional password protection and image extraction settings
-        self.parser = PyPDFParser(password=password, extract_images=extract_images)
+        # Reuse a PDF parser with the same password protection and image extraction settings
+        self.parser = _pdf_parser(password, extract_images)
 
     def load(self) -> List[Document]:
-        # Convert the binary stream into a Blob object which is required by the parser
-        blob = Blob.from_data(self.stream.getvalue())
+        # Wrap the binary stream in a Blob, which is required by the parser, without copying its bytes
+        blob = _StreamBlob(
+            stream=self.stream, path=self.filename, mimetype="application/pdf"
+        )
         # Parse the PDF and convert each page or segment into a separate document object
         documents = list(self.parser.parse(blob))
 
@@ -403,6 +922,9 @@ class CustomWordLoader(BaseLoader):
         self.filename = filename
 
     def load_and_split(self, text_splitter=None):
+        # Imported here so sessions that never open a Word file skip loading python-docx
+        from docx import Document as DocxDocument
+
         # Use python-docx to parse the Word document from the binary stream
         doc = DocxDocument(self.stream)
         # Extract and concatenate all paragraph texts into a single string
@@ -426,6 +948,12 @@ class CustomWordLoader(BaseLoader):
         return split_text
 
 
+def _sheet_text(df):
+    # Cell values row by row, one per line and unquoted (the CSV writer would
+    # quote cells holding newlines or quotes)
+    return df.stack(future_stack=True).astype(str).str.cat(sep="\n")
+
+
 class CustomExcelLoader(BaseLoader):
     """
     This class is a custom loader for Excel files. It inherits from the BaseLoader class.
@@ -443,8 +971,11 @@ class CustomExcelLoader(BaseLoader):
         self.filename = filename
 
     def load_and_split(self, text_splitter=None):
-        # Use pandas to load the Excel file from the binary stream
-        xls = pd.ExcelFile(self.stream, engine="openpyxl")
+        # Imported here: pandas alone adds about half a second and tens of MB at import
+        import pandas as pd
+
+        # Use pandas to load the Excel file from the binary stream (calamine is a Rust parser, much faster than openpyxl)
+        xls = pd.ExcelFile(self.stream, engine="calamine")
         # Get the list of all sheet names in the workbook
         sheet_names = xls.sheet_names
 
@@ -453,7 +984,7 @@ class CustomExcelLoader(BaseLoader):
             # Parse each sheet into a DataFrame
             df = xls.parse(sheet)
             # Convert the DataFrame to a single string with each cell value separated by new lines
-            text = "\n".join(df.values.astype(str).flatten().tolist())
+            text = _sheet_text(df)
 
             # Check if a text splitter is provided to further divide the sheet content
             if text_splitter is not None:
@@ -488,6 +1019,9 @@ class CustomPPTLoader(BaseLoader):
         self.filename = filename
 
     def load_and_split(self, text_splitter=None):
+        # Imported here so sessions that never open a presentation skip loading python-pptx
+        from pptx import Presentation
+
         # Use python-pptx to parse the PowerPoint file from the binary stream
         prs = Presentation(self.stream)
         # Prepare to collect documents
@@ -495,14 +1029,10 @@ class CustomPPTLoader(BaseLoader):
 
         # Iterate over each slide in the presentation
         for i, slide in enumerate(prs.slides):
-            # Extract all text content from each slide
+            # Extract all text content from each slide; text_frame.text already joins a
+            # shape's paragraphs with new lines in a single pass
             slide_text = "\n".join(
-                [
-                    paragraph.text
-                    for shape in slide.shapes
-                    if shape.has_text_frame
-                    for paragraph in shape.text_frame.paragraphs
-                ]
+                shape.text_frame.text for shape in slide.shapes if shape.has_text_frame
             )
 
             # Check if a text splitter is provided
@@ -526,7 +1056,10 @@ class CustomPPTLoader(BaseLoader):
         return documents
 
 
-import chardet
+import charset_normalizer
+
+# Bytes inspected when the encoding has to be detected; the guess stabilizes well before this
+ENCODING_SNIFF_BYTES = 64 * 1024
 
 
 class CustomTextLoader(BaseLoader):
@@ -545,10 +1078,17 @@ class CustomTextLoader(BaseLoader):
         self.filename = filename
 
     def load_and_split(self, text_splitter=None):
-        # Use chardet to detect the encoding of the stream
         rawdata = self.stream.read()
-        result = chardet.detect(rawdata)
-        text = rawdata.decode(result["encoding"])
+        try:
+            # Most files are UTF-8, which decodes without any detection
+            text = rawdata.decode("utf-8")
+        except UnicodeDecodeError:
+            # Otherwise detect the encoding from a prefix of the stream
+            result = charset_normalizer.from_bytes(
+                rawdata[:ENCODING_SNIFF_BYTES]
+            ).best()
+            encoding = result.encoding if result is not None else "utf-8"
+            text = rawdata.decode(encoding, errors="replace")
 
         if text_splitter is not None:
             split_text = text_splitter.create_documents([text])
@@ -1,21 +1,45 @@
+import threading
 import urllib.parse
+from typing import Optional
 
+import orjson
 import requests
+from cachetools import TTLCache
+
+from services.http_client import session as shared_session
+
+# site_id is stable for a site URL and does not depend on the caller's token
+SITE_ID_TTL_SECONDS = 12 * 60 * 60
+_site_id_cache = TTLCache(maxsize=512, ttl=SITE_ID_TTL_SECONDS)
+_site_id_lock = threading.Lock()
 
 
 class SiteInfo:
-    def __init__(self, site_url: str, access_token: str):
+    def __init__(
+        self,
+        site_url: str,
+        access_token: str,
+        session: Optional[requests.Session] = None,
+    ):
         self.site_url = site_url
         self.access_token = access_token
+        self.session = session or shared_session
         self.site_id = self.get_site_id()
 
     def get_site_id(self):
         """
         This function retrieves the ID of a SharePoint site using the Microsoft Graph API.
+        Results are cached per site URL for SITE_ID_TTL_SECONDS.
 
         Returns:
         str: The ID of the SharePoint site.
         """
+        cache_key = self.site_url.rstrip("/").lower()
+        with _site_id_lock:
+            site_id = _site_id_cache.get(cache_key)
+        if site_id is not None:
+            return site_id
+
         # Parse the site URL
         parsed_url = urllib.parse.urlparse(self.site_url)
         hostname = parsed_url.hostname  # e.g., tenant.sharepoint.com
@@ -26,8 +50,11 @@ class SiteInfo:
         full_url = f"https://graph.microsoft.com/v1.0/sites/{hostname}:/{site_path}"
 
         headers = {"Authorization": f"Bearer {self.access_token}"}
-        response = requests.get(full_url, headers=headers)
+        response = self.session.get(full_url, headers=headers)
         response.raise_for_status()  # Raise error if request failed
 
-        site_id = response.json().get("id")
+        site_id = orjson.loads(response.content).get("id")
+        if site_id:
+            with _site_id_lock:
+                _site_id_cache[cache_key] = site_id
         return site_id
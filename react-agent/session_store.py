@@ -0,0 +1,138 @@
+import os
+from typing import Any, Dict, List, Optional
+
+import orjson
+from cachetools import TTLCache
+from langchain_core.messages import BaseMessage, messages_from_dict, messages_to_dict
+from redis import asyncio as aioredis
+
+# Sessions idle for longer than this are dropped
+SESSION_TTL_SECONDS = 24 * 60 * 60
+# Upper bound on sessions kept by the in-process store (least recently used evicted)
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "1024"))
+
+
+class InMemorySessionStore:
+    """Bounded, process-local session store.
+
+    Suitable for a single worker; sessions are lost on restart.
+    """
+
+    def __init__(self, maxsize: int = MAX_SESSIONS, ttl: int = SESSION_TTL_SECONDS):
+        self._sessions: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def create(
+        self, session_id: str, messages: List[BaseMessage], ctx: Dict[str, Any]
+    ):
+        self._sessions[session_id] = (list(messages), dict(ctx))
+
+    async def get_context(self, session_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._sessions.get(session_id)
+        return None if entry is None else entry[1]
+
+    async def get_messages(
+        self, session_id: str, last: Optional[int] = None
+    ) -> List[BaseMessage]:
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return []
+        messages = entry[0]
+        return list(messages[-last:] if last else messages)
+
+    async def append_messages(self, session_id: str, *messages: BaseMessage):
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return
+        entry[0].extend(messages)
+        # Re-insert to refresh the TTL and LRU position
+        self._sessions[session_id] = entry
+
+    async def trim(self, session_id: str, keep_last: int):
+        """Keep the first message (system prompt) and the last ``keep_last`` messages."""
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return
+        messages = entry[0]
+        if len(messages) > keep_last + 1:
+            messages[:] = messages[:1] + messages[-keep_last:]
+
+
+# Atomically keep the head of a list plus its last ARGV[1] items
+_TRIM_KEEP_HEAD = """
+local keep = tonumber(ARGV[1])
+if redis.call('LLEN', KEYS[1]) > keep + 1 then
+    local head = redis.call('LINDEX', KEYS[1], 0)
+    redis.call('LTRIM', KEYS[1], -keep, -1)
+    redis.call('LPUSH', KEYS[1], head)
+end
+"""
+
+
+class RedisSessionStore:
+    """Redis-backed session store shared by all workers.
+
+    Messages are kept in ``session:{id}:msgs`` (list of orjson-encoded dicts) and
+    the session context in the ``session:{id}:ctx`` hash; both expire after the TTL.
+    """
+
+    def __init__(self, url: str, ttl: int = SESSION_TTL_SECONDS):
+        self._redis = aioredis.Redis.from_url(url, decode_responses=True)
+        self._ttl = ttl
+        self._trim_script = self._redis.register_script(_TRIM_KEEP_HEAD)
+
+    @staticmethod
+    def _keys(session_id: str):
+        return f"session:{session_id}:msgs", f"session:{session_id}:ctx"
+
+    @staticmethod
+    def _encode(messages) -> List[bytes]:
+        return [orjson.dumps(m) for m in messages_to_dict(list(messages))]
+
+    async def create(
+        self, session_id: str, messages: List[BaseMessage], ctx: Dict[str, Any]
+    ):
+        msgs_key, ctx_key = self._keys(session_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.delete(msgs_key, ctx_key)
+            if messages:
+                pipe.rpush(msgs_key, *self._encode(messages))
+            pipe.hset(ctx_key, mapping=ctx)
+            pipe.expire(msgs_key, self._ttl)
+            pipe.expire(ctx_key, self._ttl)
+            await pipe.execute()
+
+    async def get_context(self, session_id: str) -> Optional[Dict[str, Any]]:
+        _, ctx_key = self._keys(session_id)
+        ctx = await self._redis.hgetall(ctx_key)
+        return ctx or None
+
+    async def get_messages(
+        self, session_id: str, last: Optional[int] = None
+    ) -> List[BaseMessage]:
+        msgs_key, _ = self._keys(session_id)
+        raw = await self._redis.lrange(msgs_key, -last if last else 0, -1)
+        return messages_from_dict([orjson.loads(m) for m in raw])
+
+    async def append_messages(self, session_id: str, *messages: BaseMessage):
+        msgs_key, ctx_key = self._keys(session_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(msgs_key, *self._encode(messages))
+            pipe.expire(msgs_key, self._ttl)
+            pipe.expire(ctx_key, self._ttl)
+            await pipe.execute()
+
+    async def trim(self, session_id: str, keep_last: int):
+        """Keep the first message (system prompt) and the last ``keep_last`` messages."""
+        msgs_key, _ = self._keys(session_id)
+        await self._trim_script(keys=[msgs_key], args=[keep_last])
+
+
+def _build_session_store():
+    # Use Redis when configured so sessions survive restarts and are shared by workers
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        return RedisSessionStore(redis_url)
+    return InMemorySessionStore()
+
+
+session_store = _build_session_store()
@@ -0,0 +1,68 @@
+import hashlib
+import hmac
+import os
+import re
+import secrets
+import time
+import uuid
+from typing import Optional, Tuple
+
+from session_store import SESSION_TTL_SECONDS
+
+# Set SESSION_SECRET so issued session ids stay valid across restarts and workers
+_SECRET = os.getenv("SESSION_SECRET", "").encode() or secrets.token_bytes(32)
+
+# <sid>.<expires_at>.<mac> as produced by issue_session_id
+_SESSION_ID_RE = re.compile(r"([0-9a-f]{32})\.(\d{1,12})\.([0-9a-f]{64})")
+
+
+class SessionIdError(ValueError):
+    """Base class for session ids that fail verification."""
+
+
+class MalformedSessionId(SessionIdError):
+    """The session id is not in the issued format."""
+
+
+class SessionTokenMismatch(SessionIdError):
+    """The session id was not issued for the caller's token (or was tampered with)."""
+
+
+class ExpiredSessionId(SessionIdError):
+    """The session id is past its expiry."""
+
+
+def _assertion_hash(user_assertion: Optional[str]) -> str:
+    return hashlib.sha256((user_assertion or "").encode()).hexdigest()
+
+
+def _mac(sid: str, expires_at: int, user_assertion: Optional[str]) -> str:
+    message = f"{sid}.{expires_at}.{_assertion_hash(user_assertion)}".encode()
+    return hmac.new(_SECRET, message, hashlib.sha256).hexdigest()
+
+
+def issue_session_id(user_assertion: Optional[str]) -> Tuple[str, str]:
+    """Create a session bound to the caller's token.
+
+    Returns (sid, session_id) where session_id is the signed ``<sid>.<expires_at>.<mac>``
+    handed to the client and sid keys the session store.
+    """
+    sid = uuid.uuid4().hex
+    expires_at = int(time.time()) + SESSION_TTL_SECONDS
+    return sid, f"{sid}.{expires_at}.{_mac(sid, expires_at, user_assertion)}"
+
+
+def verify_session_id(session_id: str, user_assertion: Optional[str]) -> str:
+    """Return the bare sid if the MAC matches ``user_assertion`` and the id is unexpired.
+
+    Raises MalformedSessionId, SessionTokenMismatch or ExpiredSessionId otherwise.
+    """
+    match = _SESSION_ID_RE.fullmatch(session_id)
+    if match is None:
+        raise MalformedSessionId(session_id)
+    sid, expires_at, mac = match[1], int(match[2]), match[3]
+    if not hmac.compare_digest(mac, _mac(sid, expires_at, user_assertion)):
+        raise SessionTokenMismatch(sid)
+    if expires_at < time.time():
+        raise ExpiredSessionId(sid)
+    return sid
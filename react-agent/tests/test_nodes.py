@@ -0,0 +1,24 @@
+import os
+import sys
+
+import agent.nodes
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_nodes_module_loaded_once():
+    path = os.path.realpath(os.path.join(ROOT, "agent", "nodes.py"))
+    names = [
+        name
+        for name, module in list(sys.modules.items())
+        if getattr(module, "__file__", None)
+        and os.path.realpath(module.__file__) == path
+    ]
+
+    assert names == ["agent.nodes"]
+
+
+def test_public_names():
+    assert agent.nodes.__all__ == ["run_agent_reasoning", "tool_node"]
+    for name in agent.nodes.__all__:
+        assert hasattr(agent.nodes, name)
@@ -0,0 +1,58 @@
+import time
+
+import pytest
+
+from session_token import (
+    ExpiredSessionId,
+    MalformedSessionId,
+    SessionTokenMismatch,
+    issue_session_id,
+    verify_session_id,
+)
+
+
+def test_round_trip():
+    sid, session_id = issue_session_id("token")
+
+    assert verify_session_id(session_id, "token") == sid
+
+
+def test_round_trip_without_assertion():
+    sid, session_id = issue_session_id(None)
+
+    assert verify_session_id(session_id, None) == sid
+
+
+def test_wrong_assertion():
+    _, session_id = issue_session_id("token")
+
+    with pytest.raises(SessionTokenMismatch):
+        verify_session_id(session_id, "other-token")
+
+
+@pytest.mark.parametrize("part", [0, 1, 2])
+def test_tampered(part):
+    _, session_id = issue_session_id("token")
+    parts = session_id.split(".")
+    # Change one character while keeping the id well formed
+    parts[part] = ("1" if parts[part][0] == "0" else "0") + parts[part][1:]
+
+    with pytest.raises(SessionTokenMismatch):
+        verify_session_id(".".join(parts), "token")
+
+
+def test_expired(monkeypatch):
+    _, session_id = issue_session_id("token")
+    expires_at = int(session_id.split(".")[1])
+    monkeypatch.setattr(time, "time", lambda: expires_at + 1)
+
+    with pytest.raises(ExpiredSessionId):
+        verify_session_id(session_id, "token")
+
+
+@pytest.mark.parametrize(
+    "session_id", ["", "abc", "a.b.c", "x" * 32 + ".1.é", "0" * 32 + ".1"]
+)
+def test_malformed(session_id):
+    with pytest.raises(MalformedSessionId):
+        verify_session_id(session_id, "token")
@@ -0,0 +1,9 @@
+import pandas as pd
+
+from services.sharepoint_client import _sheet_text
+
+
+def test_sheet_text_keeps_cells_unquoted():
+    df = pd.DataFrame([["multi\nline", 'q"uote'], [1, float("nan")]])
+
+    assert _sheet_text(df) == 'multi\nline\nq"uote\n1\nnan'
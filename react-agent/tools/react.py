@@ -1,18 +1,37 @@
+import asyncio
+import contextlib
+import functools
+import hashlib
 import os
-from typing import Any, Dict, List
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional
 
+import httpx
+import numpy as np
+from cachetools import LRUCache, TTLCache
 from dotenv import load_dotenv
 from langchain.chains.retrieval import create_retrieval_chain
 from langchain.prompts import PromptTemplate
-from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
 from langchain_core.tools import tool
 from langchain_openai import AzureChatOpenAI, AzureOpenAIEmbeddings
-from langchain_text_splitters import CharacterTextSplitter
+from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langgraph.types import Command, interrupt
 
 from context_store import get_all_context, get_context_value
 from services.sharepoint_client import SharePointClient
-from utils.output_parsers import Summary, summary_parser
+from tools.schemas import (
+    CopyOneDriveFileArgs,
+    DriveIdArgs,
+    FolderIdArgs,
+    RecentOneDriveFilesArgs,
+    RecentSharePointFilesArgs,
+    SummarizeFileArgs,
+    UpdateFileMetadataArgs,
+)
+from utils.output_parsers import FORMAT_INSTRUCTIONS, Summary, summary_parser
+from utils.vector_store import DEFAULT_DTYPE, USearchVectorStore
 
 load_dotenv()
 
@@ -32,21 +51,205 @@ HUMAN
 \n{format_instructions}
 """
 
+_PROMPT = PromptTemplate.from_template(
+    template, partial_variables={"format_instructions": FORMAT_INSTRUCTIONS}
+)
+
+# Texts sent per embeddings request; Azure OpenAI accepts up to 2048 inputs
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "2048"))
+
+# Storage type of summary chunk vectors; "i8" quarters their memory against "f32"
+EMBEDDING_DTYPE = os.getenv("EMBEDDING_DTYPE", DEFAULT_DTYPE)
+
+# Falls back from paragraphs to lines to words so chunks stay near chunk_size
+text_splitter = RecursiveCharacterTextSplitter(
+    chunk_size=2000, chunk_overlap=100, separators=["\n\n", "\n", " ", ""]
+)
+
+# Documents shorter than this (about 15k tokens) are summarized from their full text
+DIRECT_SUMMARY_MAX_CHARS = 60_000
+
+# Retrieval chains of recently summarized documents, keyed by a hash of their text
+SUMMARY_CACHE_SIZE = 32
+_chain_cache: LRUCache = LRUCache(maxsize=SUMMARY_CACHE_SIZE)
+_chain_lock = threading.Lock()
+
+# Summary chunk vectors are also kept on disk, one directory per drive, so other
+# workers and restarts skip re-embedding unchanged documents; "" disables this
+VECTOR_CACHE_DIR = os.getenv("VECTOR_CACHE_DIR", "vs_cache")
+# Least recently used files are deleted once the directory grows past this size
+VECTOR_CACHE_MAX_BYTES = int(os.getenv("VECTOR_CACHE_MAX_MB", "1024")) * 1024 * 1024
+
+# Clients reused across tool calls, keyed on the site and tokens they were built with
+CLIENT_CACHE_TTL_SECONDS = 10 * 60
+_client_cache: TTLCache = TTLCache(maxsize=256, ttl=CLIENT_CACHE_TTL_SECONDS)
+_client_lock = threading.Lock()
+
+# Upper bound on concurrent download URL lookups made by one tool call
+DOWNLOAD_URL_WORKERS = 16
+
+# Shared stand-in for a missing nested Graph object
+_EMPTY = MappingProxyType({})
+
+
+@functools.lru_cache(maxsize=None)
+def get_embeddings() -> AzureOpenAIEmbeddings:
+    """Return the shared embeddings client, building it on first use."""
+    return AzureOpenAIEmbeddings(chunk_size=EMBEDDING_BATCH_SIZE)
+
+
+@functools.lru_cache(maxsize=None)
+def get_summary_chain():
+    """Return the shared summary chain, building it on first use."""
+    return _PROMPT | AzureChatOpenAI(deployment_name="gpt-4o") | summary_parser
+
 
 def _init_sharepoint_client() -> SharePointClient:
     """Initialize SharePointClient from request context, falling back to environment variables.
-    override_site_url takes precedence if provided.
+    override_site_url takes precedence if provided. Clients are reused by later tool calls
+    made with the same site and tokens.
     """
-    return SharePointClient(
-        site_url=get_context_value("SITE_URL"),
-        site_id=get_context_value("SITE_ID"),
-        access_token=get_context_value("ACCESS_TOKEN"),
-        obo_access_token=get_context_value("OBO_ACCESS_TOKEN"),
+    key = (
+        get_context_value("SITE_URL"),
+        get_context_value("SITE_ID"),
+        get_context_value("ACCESS_TOKEN"),
+        get_context_value("OBO_ACCESS_TOKEN"),
+    )
+    with _client_lock:
+        client = _client_cache.get(key)
+        if client is None:
+            client = _client_cache[key] = SharePointClient(*key)
+    return client
+
+
+def _content_key(drive_id: str, file_name: str, docs: List[Document]) -> str:
+    digest = hashlib.blake2b(f"{drive_id}/{file_name}".encode(), digest_size=16)
+    for doc in docs:
+        digest.update(b"\0")
+        digest.update(doc.page_content.encode())
+    return digest.hexdigest()
+
+
+def _vector_cache_path(drive_id: str, key: str) -> Optional[str]:
+    if not VECTOR_CACHE_DIR:
+        return None
+    # drive_id comes from the model, so it is hashed rather than used as a path
+    drive_dir = hashlib.blake2b(drive_id.encode(), digest_size=8).hexdigest()
+    return os.path.join(VECTOR_CACHE_DIR, drive_dir, f"{key}.npy")
+
+
+def _embed_documents(drive_id: str, key: str, texts: List[str]) -> np.ndarray:
+    """Embed ``texts``, reusing the vectors saved by an earlier call for the same content."""
+    path = _vector_cache_path(drive_id, key)
+    if path is not None and os.path.exists(path):
+        try:
+            vectors = np.load(path)
+            if len(vectors) == len(texts):
+                # Mark as recently used for _prune_vector_cache
+                os.utime(path)
+                return vectors
+        except (OSError, ValueError):
+            pass
+
+    vectors = np.asarray(get_embeddings().embed_documents(texts), dtype=np.float32)
+    if path is not None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so concurrent summaries of a drive never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, vectors)
+        os.replace(tmp_path, path)
+        _prune_vector_cache()
+    return vectors
+
+
+def _prune_vector_cache():
+    """Delete the least recently used vector files beyond VECTOR_CACHE_MAX_BYTES."""
+    entries = []
+    for drive_dir in os.scandir(VECTOR_CACHE_DIR):
+        if not drive_dir.is_dir():
+            continue
+        for entry in os.scandir(drive_dir.path):
+            if entry.name.endswith(".npy"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= VECTOR_CACHE_MAX_BYTES:
+            break
+        # Another worker may have removed it already
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+        total -= size
+
+
+def _retrieval_chain(drive_id: str, file_name: str, docs: List[Document]):
+    """Return the retrieval chain for ``docs``, embedding them only on a cache miss."""
+    key = _content_key(drive_id, file_name, docs)
+    with _chain_lock:
+        chain = _chain_cache.get(key)
+    if chain is not None:
+        return chain
+
+    texts = [doc.page_content for doc in docs]
+    vectors = _embed_documents(drive_id, key, texts)
+    vectorstore = USearchVectorStore.from_embeddings(
+        zip(texts, vectors),
+        get_embeddings(),
+        metadatas=[doc.metadata for doc in docs],
+        dtype=EMBEDDING_DTYPE,
     )
+    chain = create_retrieval_chain(vectorstore.as_retriever(), get_summary_chain())
+    with _chain_lock:
+        _chain_cache[key] = chain
+    return chain
+
+
+def _simplify(f: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a Graph driveItem into the dict returned by the file listing tools."""
+    parent = f.get("parentReference") or _EMPTY
+    created_by = (f.get("createdBy") or _EMPTY).get("user") or _EMPTY
+    modified_by = (f.get("lastModifiedBy") or _EMPTY).get("user") or _EMPTY
+    return {
+        "name": f.get("name"),
+        "modified": f.get("lastModifiedDateTime"),
+        "webUrl": f.get("webUrl"),
+        "id": f.get("id"),
+        "size": f.get("size"),
+        "drive_id": parent.get("driveId"),
+        "folder_id": parent.get("id"),
+        "file_type": (f.get("file") or _EMPTY).get("mimeType"),
+        "download_url": None,
+        "created_by": created_by.get("displayName"),
+        "last_modified_by": modified_by.get("displayName"),
+    }
+
+
+async def _fill_download_urls(
+    client: SharePointClient,
+    simplified: List[Dict[str, Any]],
+    drive_id: Optional[str] = None,
+):
+    """Look up the download URL of every file concurrently and store it in place.
+
+    Each file is looked up in ``drive_id`` when given, otherwise in its own drive.
+    """
+    slots = asyncio.Semaphore(DOWNLOAD_URL_WORKERS)
+
+    async def fill(f: Dict[str, Any]):
+        async with slots:
+            f["download_url"] = await asyncio.to_thread(
+                client.get_file_download_url, drive_id or f["drive_id"], f["id"]
+            )
+
+    await asyncio.gather(*(fill(f) for f in simplified))
 
 
 @tool
-def get_one_drive_id() -> str:
+async def get_one_drive_id() -> str:
     """
     Returns the unique ID of the current user's OneDrive drive.
 
@@ -58,14 +261,14 @@ def get_one_drive_id() -> str:
     """
     try:
         client = _init_sharepoint_client()
-        drive_id = client.get_one_drive_id()
+        drive_id = await asyncio.to_thread(client.get_one_drive_id)
         return drive_id
     except Exception as e:
         return f"Error: {str(e)}"
 
 
-@tool
-def get_drive_id(library_name: str) -> str:
+@tool(args_schema=DriveIdArgs)
+async def get_drive_id(library_name: str) -> str:
     """
     Returns the unique ID of a document library (SharePoint drive) by its name.
 
@@ -77,14 +280,14 @@ def get_drive_id(library_name: str) -> str:
     """
     try:
         client = _init_sharepoint_client()
-        drive_id = client.get_drive_id(library_name)
+        drive_id = await asyncio.to_thread(client.get_drive_id, library_name)
         return drive_id
     except Exception as e:
         return f"Error: {str(e)}"
 
 
-@tool
-def get_folder_id(drive_id: str, folder_path: str = "") -> str:
+@tool(args_schema=FolderIdArgs)
+async def get_folder_id(drive_id: str, folder_path: str = "") -> str:
     """
     Returns the unique ID of a folder in a SharePoint document library or OneDrive.
 
@@ -97,14 +300,14 @@ def get_folder_id(drive_id: str, folder_path: str = "") -> str:
     """
     try:
         client = _init_sharepoint_client()
-        folder_id = client.get_folder_id(drive_id, folder_path)
+        folder_id = await asyncio.to_thread(client.get_folder_id, drive_id, folder_path)
         return folder_id
     except Exception as e:
         return f"Error: {str(e)}"
 
 
-@tool
-def recent_sharepoint_files(
+@tool(args_schema=RecentSharePointFilesArgs)
+async def recent_sharepoint_files(
     drive_id: str,
     file_name: str,
     top: int,
@@ -134,37 +337,22 @@ def recent_sharepoint_files(
             - last_modified_by (str or None): The display name of the user who last modified the file.
     """
     try:
+        if top <= 0 or not file_name:
+            return []
         client = _init_sharepoint_client()
-        files = client.get_all_files_in_drive(drive_id, file_name, top)
-        simplified = [
-            {
-                "name": f.get("name"),
-                "modified": f.get("lastModifiedDateTime"),
-                "webUrl": f.get("webUrl"),
-                "id": f.get("id"),
-                "size": f.get("size"),
-                "drive_id": f.get("parentReference", {}).get("driveId"),
-                "folder_id": f.get("parentReference", {}).get("id"),
-                "file_type": f.get("file", {}).get("mimeType"),
-                "download_url": (
-                    client.get_file_download_url(drive_id, f.get("id"))
-                    if file_download
-                    else None
-                ),
-                "created_by": f.get("createdBy", {}).get("user", {}).get("displayName"),
-                "last_modified_by": f.get("lastModifiedBy", {})
-                .get("user", {})
-                .get("displayName"),
-            }
-            for f in files
-        ]
+        files = await asyncio.to_thread(
+            client.get_all_files_in_drive, drive_id, file_name, top
+        )
+        simplified = [_simplify(f) for f in files]
+        if file_download:
+            await _fill_download_urls(client, simplified, drive_id)
         return simplified
     except Exception as e:
         return f"Error: {str(e)}"
 
 
-@tool
-def recent_onedrive_files(
+@tool(args_schema=RecentOneDriveFilesArgs)
+async def recent_onedrive_files(
     file_name: str,
     top: int,
     file_download: bool = False,
@@ -192,39 +380,24 @@ def recent_onedrive_files(
             - last_modified_by (str or None): The display name of the user who last modified the file.
     """
     try:
+        if top <= 0 or not file_name:
+            return []
         client = _init_sharepoint_client()
-        files = client.get_recent_onedrive_files(file_name, top)
-        simplified = [
-            {
-                "name": f.get("name"),
-                "modified": f.get("lastModifiedDateTime"),
-                "webUrl": f.get("webUrl"),
-                "id": f.get("id"),
-                "size": f.get("size"),
-                "drive_id": f.get("parentReference", {}).get("driveId"),
-                "folder_id": f.get("parentReference", {}).get("id"),
-                "file_type": f.get("file", {}).get("mimeType"),
-                "download_url": (
-                    client.get_file_download_url(
-                        f.get("parentReference", {}).get("driveId"), f.get("id")
-                    )
-                    if file_download
-                    else None
-                ),
-                "created_by": f.get("createdBy", {}).get("user", {}).get("displayName"),
-                "last_modified_by": f.get("lastModifiedBy", {})
-                .get("user", {})
-                .get("displayName"),
-            }
-            for f in files
-        ]
+        files = await asyncio.to_thread(
+            client.get_recent_onedrive_files, file_name, top
+        )
+        simplified = [_simplify(f) for f in files]
+        if file_download:
+            await _fill_download_urls(client, simplified)
         return simplified
     except Exception as e:
         return f"Error: {str(e)}"
 
 
-@tool
-def copy_onedrive_file(file_id: str, drive_id: str, folder_id: str) -> Dict[str, Any]:
+@tool(args_schema=CopyOneDriveFileArgs)
+async def copy_onedrive_file(
+    file_id: str, drive_id: str, folder_id: str
+) -> Dict[str, Any]:
     """
     Copies a file from OneDrive to a specified SharePoint document library and folder.
 
@@ -240,14 +413,14 @@ def copy_onedrive_file(file_id: str, drive_id: str, folder_id: str) -> Dict[str,
     """
     try:
         client = _init_sharepoint_client()
-        client.copyfile(file_id, drive_id, folder_id)
+        await asyncio.to_thread(client.copyfile, file_id, drive_id, folder_id)
         return {"success": True}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
 @tool
-def get_site_analytics() -> Dict[str, Any]:
+async def get_site_analytics() -> Dict[str, Any]:
     """
     Retrieves analytics data for the current SharePoint site.
 
@@ -261,14 +434,14 @@ def get_site_analytics() -> Dict[str, Any]:
     """
     try:
         client = _init_sharepoint_client()
-        analytics = client.get_site_analytics()
+        analytics = await asyncio.to_thread(client.get_site_analytics)
         return analytics
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
-@tool
-def summarize_file(drive_id: str, file_name: str) -> Dict[str, Any]:
+@tool(args_schema=SummarizeFileArgs)
+async def summarize_file(drive_id: str, file_name: str) -> Dict[str, Any]:
     """
     Summarizes the content of a document from a SharePoint document library or OneDrive.
 
@@ -286,39 +459,27 @@ def summarize_file(drive_id: str, file_name: str) -> Dict[str, Any]:
         client = _init_sharepoint_client()
 
         # return loader and file_id
-        loader = client.load_sharepoint_document_by_name(drive_id, file_name)
-
-        text_splitter = CharacterTextSplitter(
-            separator="\n", chunk_size=1000, chunk_overlap=0
+        loader = await asyncio.to_thread(
+            client.load_sharepoint_document_by_name, drive_id, file_name
         )
-        docs = loader.load_and_split(
-            text_splitter=text_splitter
-        )  # Uncomment this line if you want to use the specific text splitter.
 
-        embeddings = AzureOpenAIEmbeddings()
-        vectorstore = FAISS.from_documents(docs, embeddings)
-        vectorstore.save_local(f"faiss_index_{file_name}")
-
-        new_vectorstore = FAISS.load_local(
-            f"faiss_index_{file_name}", embeddings, allow_dangerous_deserialization=True
-        )
-        retrieval_qa_chat_prompt = PromptTemplate.from_template(
-            template,
-            partial_variables={
-                "format_instructions": summary_parser.get_format_instructions()
-            },
+        docs = await asyncio.to_thread(
+            loader.load_and_split, text_splitter=text_splitter
         )
 
-        llmm = AzureChatOpenAI(deployment_name="gpt-4o")
-
-        combine_docs_chain = retrieval_qa_chat_prompt | llmm | summary_parser
-
-        retrieval_chain = create_retrieval_chain(
-            new_vectorstore.as_retriever(), combine_docs_chain
-        )
         query = "Please provide a brief, neutral summary of the document in 3–4 sentences, and suggest a short, clear title that reflects its main topic."
-        response = retrieval_chain.invoke({"input": query})
-        answer: Summary = response["answer"]
+        if sum(len(doc.page_content) for doc in docs) < DIRECT_SUMMARY_MAX_CHARS:
+            # The whole document fits in the prompt, so skip embedding and retrieval
+            context = "\n\n".join(doc.page_content for doc in docs)
+            answer: Summary = await get_summary_chain().ainvoke(
+                {"context": context, "input": query}
+            )
+        else:
+            retrieval_chain = await asyncio.to_thread(
+                _retrieval_chain, drive_id, file_name, docs
+            )
+            response = await retrieval_chain.ainvoke({"input": query})
+            answer: Summary = response["answer"]
 
         metadata = {"Summary": answer.title + "|" + answer.summary}
 
@@ -326,17 +487,10 @@ def summarize_file(drive_id: str, file_name: str) -> Dict[str, Any]:
 
     except Exception as e:
         return {"error": str(e)}
-    finally:
-        # Clean up resources, if any, cleanup vector store files
-        index_name = f"faiss_index_{file_name}"
-        if os.path.exists(index_name):
-            for file in os.listdir(index_name):
-                os.remove(os.path.join(index_name, file))
-            os.rmdir(index_name)
 
 
-@tool
-def update_file_metadata(
+@tool(args_schema=UpdateFileMetadataArgs)
+async def update_file_metadata(
     drive_id: str,
     file_id: str,
     metadata: Dict[str, Any],
@@ -356,10 +510,12 @@ def update_file_metadata(
     """
     try:
         client = _init_sharepoint_client()
-        client.update_file_metadata(drive_id, file_id, metadata)
+        await asyncio.to_thread(
+            client.update_file_metadata, drive_id, file_id, metadata
+        )
         return {"success": True}
     except Exception as e:
-        return {"error": str(e)}
+        return {"success": False, "error": str(e)}
 
 
 tools = [
@@ -374,4 +530,19 @@ tools = [
     get_site_analytics,
 ]
 
-llm = AzureChatOpenAI(deployment_name="gpt-4o", temperature=0).bind_tools(tools)
+
+# Longest wait for the model to connect and to send its first (or next) token. Only
+# the request itself is retried, so no streamed token is ever sent twice.
+LLM_TIMEOUT_SECONDS = 15
+LLM_MAX_RETRIES = 1
+
+
+@functools.lru_cache(maxsize=None)
+def get_llm():
+    """Return the tool-calling chat model, building it on first use."""
+    return AzureChatOpenAI(
+        deployment_name="gpt-4o",
+        temperature=0,
+        timeout=httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=3.0),
+        max_retries=LLM_MAX_RETRIES,
+    ).bind_tools(tools, parallel_tool_calls=True)
@@ -0,0 +1,48 @@
+from typing import Any, Dict
+
+from pydantic import BaseModel, ConfigDict
+
+
+class ToolArgs(BaseModel):
+    # Tool arguments come straight from the model's tool call JSON: reject unknown
+    # keys and never revalidate defaults or mutate after parsing
+    model_config = ConfigDict(extra="forbid", validate_default=False, frozen=True)
+
+
+class DriveIdArgs(ToolArgs):
+    library_name: str
+
+
+class FolderIdArgs(ToolArgs):
+    drive_id: str
+    folder_path: str = ""
+
+
+class RecentSharePointFilesArgs(ToolArgs):
+    drive_id: str
+    file_name: str
+    top: int
+    file_download: bool = False
+
+
+class RecentOneDriveFilesArgs(ToolArgs):
+    file_name: str
+    top: int
+    file_download: bool = False
+
+
+class CopyOneDriveFileArgs(ToolArgs):
+    file_id: str
+    drive_id: str
+    folder_id: str
+
+
+class SummarizeFileArgs(ToolArgs):
+    drive_id: str
+    file_name: str
+
+
+class UpdateFileMetadataArgs(ToolArgs):
+    drive_id: str
+    file_id: str
+    metadata: Dict[str, Any]
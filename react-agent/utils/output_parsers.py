@@ -1,15 +1,24 @@
 from typing import Dict
 
+import orjson
 from langchain_core.output_parsers import PydanticOutputParser
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class Summary(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     title: str = Field(description="title of the document")
     summary: str = Field(description="summary")
 
     def to_dict(self) -> Dict[str, str]:
         return {"title": self.title, "summary": self.summary}
 
+    def to_json(self) -> bytes:
+        return orjson.dumps(self.to_dict())
+
 
 summary_parser = PydanticOutputParser(pydantic_object=Summary)
+
+# Rendered once; the schema text never changes at runtime
+FORMAT_INSTRUCTIONS: str = summary_parser.get_format_instructions()
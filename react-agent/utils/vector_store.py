@@ -0,0 +1,152 @@
+from typing import Any, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from usearch.index import Index
+
+# Storage type for vectors; "f32", "f16" or "i8"
+DEFAULT_DTYPE = "f16"
+
+# Stores up to this many vectors skip the USearch index and are scanned with one
+# NumPy matrix product, which costs less per query than an index search call
+MATRIX_SCAN_MAX_VECTORS = 1000
+
+# NumPy storage types for the matrix scan; i8 holds unit vectors scaled by I8_SCALE
+_MATRIX_DTYPES = {"f32": np.float32, "f16": np.float16, "i8": np.int8}
+I8_SCALE = 127
+# Rows widened to float32 at once by the matrix scan (about 1.5 MB at 1536 dims)
+MATRIX_SCAN_BLOCK_ROWS = 256
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    # Unit length keeps values in the [-1, 1] range the i8 quantizer maps onto
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _matrix_search(
+    vectors: np.ndarray, query: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the keys and cosine distances of the ``k`` rows closest to ``query``."""
+    # NumPy only has fast float32 matrix products, so quantized rows are widened a
+    # block at a time: the temporary stays at MATRIX_SCAN_BLOCK_ROWS rows, never a
+    # float32 copy of the whole matrix
+    similarities = np.empty(len(vectors), dtype=np.float32)
+    for start in range(0, len(vectors), MATRIX_SCAN_BLOCK_ROWS):
+        block = vectors[start : start + MATRIX_SCAN_BLOCK_ROWS]
+        similarities[start : start + len(block)] = (
+            block.astype(np.float32, copy=False) @ query
+        )
+    if vectors.dtype == np.int8:
+        similarities /= I8_SCALE
+    if k < len(similarities):
+        keys = np.argpartition(-similarities, k - 1)[:k]
+    else:
+        keys = np.arange(len(similarities))
+    keys = keys[np.argsort(-similarities[keys])]
+    return keys, 1 - similarities[keys]
+
+
+class USearchVectorStore(VectorStore):
+    """In-memory vector store doing exact cosine search over quantized vectors.
+
+    Meant for the chunks of a single document, where an exact scan is cheaper
+    than building an approximate index. Small stores keep their vectors as a
+    plain NumPy matrix instead of a USearch index.
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        index: Union[Index, np.ndarray],
+        docs: List[Document],
+    ):
+        self._embedding = embedding
+        self._index = index
+        self._docs = docs
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    @classmethod
+    def from_embeddings(
+        cls,
+        text_embeddings: Iterable[Tuple[str, List[float]]],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        dtype: str = DEFAULT_DTYPE,
+        **kwargs: Any,
+    ) -> "USearchVectorStore":
+        """Build the store from precomputed ``(text, vector)`` pairs.
+
+        Vectors are stored as ``dtype``: ``"f16"`` halves their size and ``"i8"``
+        quarters it, with little effect on cosine ranking. This holds for the
+        NumPy matrix used by stores of at most ``MATRIX_SCAN_MAX_VECTORS``
+        vectors as well as for the USearch index used above that.
+        """
+        texts, vectors = zip(*text_embeddings)
+        metadatas = metadatas or [{} for _ in texts]
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+        if len(texts) <= MATRIX_SCAN_MAX_VECTORS:
+            if dtype == "i8":
+                index = np.round(vectors * I8_SCALE).astype(np.int8)
+            else:
+                index = vectors.astype(_MATRIX_DTYPES.get(dtype, np.float32))
+        else:
+            index = Index(ndim=vectors.shape[1], metric="cos", dtype=dtype)
+            index.add(np.arange(len(texts)), vectors)
+        docs = [
+            Document(page_content=text, metadata=metadata)
+            for text, metadata in zip(texts, metadatas)
+        ]
+        return cls(embedding, index, docs)
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        **kwargs: Any,
+    ) -> "USearchVectorStore":
+        vectors = embedding.embed_documents(list(texts))
+        return cls.from_embeddings(zip(texts, vectors), embedding, metadatas, **kwargs)
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4
+    ) -> List[Tuple[Document, float]]:
+        """Return the ``k`` closest documents with their cosine distance."""
+        k = min(k, len(self._docs))
+        if k == 0:
+            return []
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        if isinstance(self._index, np.ndarray):
+            keys, distances = _matrix_search(self._index, query, k)
+        else:
+            matches = self._index.search(query, k, exact=True)
+            keys, distances = matches.keys, matches.distances
+        return [
+            (self._docs[key], float(distance)) for key, distance in zip(keys, distances)
+        ]
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Document]:
+        return [
+            doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)
+        ]
+
+    def similarity_search(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Document]:
+        return self.similarity_search_by_vector(self._embedding.embed_query(query), k)
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(
+            self._embedding.embed_query(query), k
+        )